@@ -1,7 +1,12 @@
 import pygame
 import pygame_gui
+from neurorefactor.ui.image_pyramid import ImagePyramid
+from neurorefactor.ui.sprite_cache import SpriteCache
+from neurorefactor.ui.text_cache import text_cache
 
 class BattlemapDrawing:
+    FULL_REDRAW_CELLS = 1000
+
     def __init__(self, window_size):
         self.window_size = window_size
         self.window_surface = pygame.display.set_mode(self.window_size)
@@ -11,7 +16,19 @@ class BattlemapDrawing:
         
         self.grid = None
         self.grid_surface = None
+        # Persistent layers composited into grid_surface at most once per frame
+        self.grid_layer = None
+        self.grid_layer_source = None
+        self.label_layer = None
+        self.entity_layer = None
+        self.needs_compose = False
+        # Hover highlight, blitted over grid_surface each frame so moving it never recomposites
+        self.highlight_overlay = None
+        self.highlight_overlay_key = None
+        # While a grid slider is dragged, only a coarse outline of the grid is composited
+        self.preview = False
         self.battlemap = None
+        self.battlemap_pyramid = None
         self.resized_battlemap = None
 
         self.show_labels = False
@@ -31,59 +48,125 @@ class BattlemapDrawing:
         self.show_terrain_labels = False
         self.show_entity_labels = False
         self.entity_sprites = {}  # Add this line to store entity sprites
+        self.sprite_cache = SpriteCache(height_in_tiles=1.6)  # 160% of the tile size
 
-    def update_battlemap_image(self, scale, offset=(0, 0)):
+    def update_battlemap_image(self, scale, offset=(0, 0), smooth=True):
         if self.battlemap:
             original_size = self.battlemap.get_size()
             new_size = (int(original_size[0] * scale / 100), int(original_size[1] * scale / 100))
-            self.resized_battlemap = pygame.transform.smoothscale(self.battlemap, new_size)
+            if self.battlemap_pyramid is None or self.battlemap_pyramid.source is not self.battlemap:
+                self.battlemap_pyramid = ImagePyramid(self.battlemap)
+            self.resized_battlemap = self.battlemap_pyramid.scaled(new_size, smooth)
             self.image_offset = offset
 
+    def show_preview(self, scale, offset=(0, 0)):
+        """
+        Show the background and a coarse grid outline only, until the next update_grid_surface.
+        """
+        self.update_battlemap_image(scale, offset, smooth=False)
+        self.preview = True
+        self.needs_compose = True
+
     def update_grid_surface(self, tile_tags, entity_tags):
+        """
+        Rebuild the label and entity layers (and the grid layer if the grid changed) and
+        schedule a recomposite. Use update_cells when only a few tiles changed.
+        """
         if self.grid:
-            self.grid_surface = pygame.Surface(self.map_window.get_relative_rect().size, pygame.SRCALPHA)
-            if self.resized_battlemap:
-                self.grid_surface.blit(self.resized_battlemap, self.image_offset)
-            self.grid.draw(self.grid_surface)
+            self.preview = False
+            size = self.map_window.get_relative_rect().size
+            if self.grid_layer is None or self.grid_layer_source is not self.grid:
+                self.grid_layer = pygame.Surface(size, pygame.SRCALPHA)
+                self.grid.draw_lines(self.grid_layer)
+                self.grid_layer_source = self.grid
 
+            # Hidden layers are left stale; toggling them on goes through here again
+            self.label_layer = pygame.Surface(size, pygame.SRCALPHA)
             if self.show_terrain_labels:
                 self.draw_terrain_labels(tile_tags)
+            self.entity_layer = pygame.Surface(size, pygame.SRCALPHA)
             if self.show_entity_labels:
                 self.draw_entity_labels(entity_tags)
+            self.needs_compose = True
+
+    def update_cells(self, tile_tags, entity_tags, cells, entity_changed=False):
+        """
+        Redraw only the label polygons of `cells` (and the neighbours sharing their edges) on the
+        persistent label layer. The entity layer is rebuilt only if an entity changed.
+        """
+        # Large fills are cheaper to redraw from scratch than cell by cell
+        if not self.grid or self.label_layer is None or len(cells) > self.FULL_REDRAW_CELLS:
+            self.update_grid_surface(tile_tags, entity_tags)
+            return
+        if self.show_terrain_labels:
+            neighbours = set()
+            for grid_x, grid_y in cells:
+                pygame.draw.polygon(self.label_layer, (0, 0, 0, 0), self.grid.lattice.polygon(grid_x, grid_y))
+                neighbours.update((grid_x + dx, grid_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+            for neighbour in neighbours:
+                tag = tile_tags.get(neighbour)
+                if tag in self.label_colors:
+                    pygame.draw.polygon(self.label_layer, self.label_colors[tag], self.grid.lattice.polygon(*neighbour))
+        if entity_changed and self.show_entity_labels:
+            self.entity_layer.fill((0, 0, 0, 0))
+            self.draw_entity_labels(entity_tags)
+        self.needs_compose = True
 
-            self.map_window.set_image(self.grid_surface)
+    def compose(self):
+        size = self.map_window.get_relative_rect().size
+        if self.grid_surface is None or self.grid_surface.get_size() != size:
+            self.grid_surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.grid_surface.fill((0, 0, 0, 0))
+        if self.resized_battlemap:
+            self.grid_surface.blit(self.resized_battlemap, self.image_offset)
+        if self.preview:
+            # draw() blits grid_surface directly; the map window's copy is refreshed afterwards
+            self.grid.draw_preview(self.grid_surface)
+            self.needs_compose = False
+            return
+        self.grid_surface.blit(self.grid_layer, (0, 0))
+        if self.show_terrain_labels:
+            self.grid_surface.blit(self.label_layer, (0, 0))
+        if self.show_entity_labels:
+            self.grid_surface.blit(self.entity_layer, (0, 0))
+        self.map_window.set_image(self.grid_surface)
+        self.needs_compose = False
+
+    def draw_highlight(self):
+        if not self.grid.highlighted_cell:
+            return
+        key = (self.grid, self.grid.highlighted_cell)
+        if key != self.highlight_overlay_key:
+            self.highlight_overlay = self.grid.highlight_overlay(*self.grid.highlighted_cell, (255, 255, 0, 100))
+            self.highlight_overlay_key = key
+        overlay, (left, top) = self.highlight_overlay
+        map_rect = self.map_window.get_relative_rect()
+        previous_clip = self.window_surface.get_clip()
+        self.window_surface.set_clip(map_rect)
+        self.window_surface.blit(overlay, (map_rect.left + left, map_rect.top + top))
+        self.window_surface.set_clip(previous_clip)
 
     def draw_terrain_labels(self, tile_tags):
         for (grid_x, grid_y), tag in tile_tags.items():
             if tag in self.label_colors:
                 color = self.label_colors[tag]
-                points = [
-                    self.grid.grid_to_screen(grid_x, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y + 1),
-                    self.grid.grid_to_screen(grid_x, grid_y + 1)
-                ]
-                pygame.draw.polygon(self.grid_surface, color, points)
+                pygame.draw.polygon(self.label_layer, color, self.grid.lattice.polygon(grid_x, grid_y))
     
     def draw_entity_labels(self, entity_tags):
+        placed = []
         for (grid_x, grid_y), entity in entity_tags.items():
             if entity in self.entity_sprites:
-                sprite = self.entity_sprites[entity]
-                
-                # Calculate tile dimensions
-                tile_width = self.grid.tile_size
-
-                # Resize sprite to a percentage of the tile size
-                entity_height = tile_width*1.6  # 150% of tile height
-                aspect_ratio = sprite.get_width() / sprite.get_height()
-                entity_width = int(entity_height * aspect_ratio)
-                resized_sprite = pygame.transform.smoothscale(sprite, (entity_width, entity_height))
-                
+                # Scaled once per tile size, not once per placed entity
+                sprite = self.sprite_cache.get(entity, self.entity_sprites[entity], self.grid.tile_size)
+
                 # Calculate position (feet at the center of the tile)
                 center_x, center_y = self.grid.grid_to_screen(grid_x+0.9, grid_y + 0.9)
-                sprite_rect = resized_sprite.get_rect(midbottom=(center_x, center_y))
-                
-                self.grid_surface.blit(resized_sprite, sprite_rect)
+                placed.append((center_y, center_x, sprite))
+
+        # Back to front by the projected feet position, whatever the rotation, so nearer sprites overlap farther ones
+        placed.sort(key=lambda item: (item[0], item[1]))
+        blits = [(sprite, sprite.get_rect(midbottom=(center_x, center_y))) for center_y, center_x, sprite in placed]
+        self.entity_layer.blits(blits, doreturn=False)
 
 
     def draw(self, tile_tags, entity_tags):
@@ -91,15 +174,18 @@ class BattlemapDrawing:
         self.ui_manager.draw_ui(self.window_surface)
         
         if self.grid:
+            if self.needs_compose:
+                self.compose()
             if self.grid_surface:
                 self.window_surface.blit(self.grid_surface, (600, 0))
+            if not self.preview:
+                self.draw_highlight()
             if self.grid.highlighted_cell:
-                font = pygame.font.Font(None, 36)
-                pos_text = font.render(f"Pos: {self.grid.highlighted_cell}", True, (255, 255, 255))
+                pos_text = text_cache.render(f"Pos: {self.grid.highlighted_cell}")
                 terrain_tag = tile_tags.get(self.grid.highlighted_cell, "None")
                 entity_tag = entity_tags.get(self.grid.highlighted_cell, "None")
-                terrain_text = font.render(f"Terrain: {terrain_tag}", True, (255, 255, 255))
-                entity_text = font.render(f"Entity: {entity_tag}", True, (255, 255, 255))
+                terrain_text = text_cache.render(f"Terrain: {terrain_tag}")
+                entity_text = text_cache.render(f"Entity: {entity_tag}")
                 self.window_surface.blit(pos_text, (self.window_size[0] - pos_text.get_width() - 310, 10))
                 self.window_surface.blit(terrain_text, (self.window_size[0] - terrain_text.get_width() - 310, 50))
                 self.window_surface.blit(entity_text, (self.window_size[0] - entity_text.get_width() - 310, 90))
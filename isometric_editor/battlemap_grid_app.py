@@ -2,12 +2,20 @@ import pygame
 import pygame_gui
 from pygame_gui.windows import UIFileDialog
 import os
+import time
 from isometric_map import GridConfig, IsometricGrid
 from battlemap_drawing import BattlemapDrawing
 from grid_config_window import GridConfigWindow
 from grid_labels_window import GridLabelsWindow
+from neurorefactor.stroke import Stroke
+from neurorefactor.tag_fill import flood_fill, shape_cells
+from neurorefactor.edit_history import EditHistory
+from neurorefactor.tile_layer import TileLayer
+from neurorefactor.ui.pick_buffer import PickBuffer
 
 class BattlemapGridApp:
+    SLIDER_SETTLE_SECONDS = 0.2
+
     def __init__(self):
         pygame.init()
         pygame.display.set_caption('DnD Isometric Grid App')
@@ -15,20 +23,26 @@ class BattlemapGridApp:
         self.initial_grid_origin = [0, 0]
         self.window_size = (2520, 1080)
         self.drawing = BattlemapDrawing(self.window_size)
-        self.is_dragging = False
+        self.stroke = Stroke(lambda x, y: self.drawing.grid.screen_to_grid(x, y))
+        self.shape_outline = []
         self.image_path = None
         self.load_battlemap_dialog = None
         self.save_session_dialog = None
         self.load_session_dialog = None
 
-        self.tile_tags = {}
-        self.entity_tags = {}
+        self.tile_tags = TileLayer()
+        self.entity_tags = TileLayer()
         self.entity_sprites = {}
         self.static_highlight = False
+        # Set while a grid slider is dragged: the full redraw waits until it settles
+        self.grid_settle_time = None
+        self.preview_parameters = None
 
         self.setup_ui()
         self.initialize_grid()
         self.starting_config = self.get_current_config()
+        self.history = EditHistory()
+        self.grid_parameters = self.get_grid_parameters()
 
         self.clock = pygame.time.Clock()
         self.is_running = True
@@ -98,8 +112,10 @@ class BattlemapGridApp:
     def initialize_grid(self):
         map_rect = self.drawing.map_window.get_relative_rect()
         config = self.config_window.get_config()
+        # Tile ids under each map pixel, shared by every grid this app creates
+        self.pick_buffer = PickBuffer(map_rect.size)
         self.drawing.grid = IsometricGrid(config['grid_size_x'], config['grid_size_y'], config['tile_size'],
-                                          (map_rect.width, map_rect.height))
+                                          (map_rect.width, map_rect.height), pick_buffer=self.pick_buffer)
         self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
 
 
@@ -117,7 +133,19 @@ class BattlemapGridApp:
                     self.handle_bind_toggle()
                 elif config_update in ['grid_origin_x', 'grid_origin_y']:
                     self.handle_grid_origin_change(config_update)
-                self.update_grid()
+                if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
+                    # Recorded by settle_grid
+                    self.grid_settle_time = time.monotonic() + self.SLIDER_SETTLE_SECONDS
+                else:
+                    self.update_grid()
+                    self.record_grid_change()
+
+            # Ctrl+Z in a text box belongs to the text box, not to the map
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and not self.text_entry_focused():
+                if event.key == pygame.K_z and not event.mod & pygame.KMOD_SHIFT:
+                    self.undo()
+                elif event.key in (pygame.K_y, pygame.K_z):
+                    self.redo()
 
             label_update = self.labels_window.handle_event(event)
             if label_update:
@@ -130,14 +158,49 @@ class BattlemapGridApp:
                 self.handle_mouse_down(event)
 
             if event.type == pygame.MOUSEBUTTONUP:
-                if event.button == 1:  # Left click release
-                    self.is_dragging = False
+                if event.button == 1 and self.stroke.active:  # Left click release
+                    self.stroke.end()
+                    if self.labels_window.get_active_tool() in ("rectangle", "lasso"):
+                        self.finish_shape()
 
             if event.type == pygame.MOUSEMOTION:
                 self.handle_mouse_motion(event)
 
             self.drawing.ui_manager.process_events(event)
 
+        # Paint everything the stroke covered since the last frame in one go
+        self.apply_stroke()
+        self.update_grid_preview()
+
+    def update_grid_preview(self):
+        """
+        While a slider is dragged, redraw at most a coarse preview per frame, however many slider
+        events arrived; once it has been still for SLIDER_SETTLE_SECONDS, do the full redraw.
+        """
+        if self.grid_settle_time is None:
+            return
+        if time.monotonic() >= self.grid_settle_time:
+            self.settle_grid()
+            return
+        config = self.config_window.get_config()
+        parameters = (dict(config), tuple(self.image_offset))
+        if parameters == self.preview_parameters:
+            return
+        self.preview_parameters = parameters
+        self.config_window.sync_inputs()
+        self.drawing.grid = self.create_grid(config)
+        offset = tuple(self.image_offset) if config['is_bound'] else (0, 0)
+        self.drawing.show_preview(config['image_scale'], offset)
+
+    def settle_grid(self):
+        if self.grid_settle_time is None:
+            return
+        self.grid_settle_time = None
+        self.preview_parameters = None
+        self.config_window.sync_inputs()
+        self.update_grid()
+        self.record_grid_change()
+
     def handle_button_press(self, event):
         if event.ui_element == self.load_button:
             self.load_battlemap()
@@ -149,6 +212,7 @@ class BattlemapGridApp:
             self.remove_image()
         elif event.ui_element == self.reset_battlemap_button:
             self.initialize_grid()
+            self.record_grid_change()
 
     def handle_bind_toggle(self):
         config = self.config_window.get_config()
@@ -171,18 +235,20 @@ class BattlemapGridApp:
                 delta = new_y - self.initial_grid_origin[1]
                 self.image_offset[1] += delta
                 self.initial_grid_origin[1] = new_y
-            self.update_battlemap_image()
 
     def update_grid(self):
-        config = self.config_window.get_config()
-        map_rect = self.drawing.map_window.get_relative_rect()
-        self.drawing.grid = IsometricGrid(config['grid_size_x'], config['grid_size_y'], config['tile_size'], 
-                                  (map_rect.width, map_rect.height), 
-                                  origin=(config['grid_origin_x'], config['grid_origin_y']),
-                                  isometric_angle=config['isometric_angle'],
-                                  rotation=config['rotation'])
+        self.drawing.grid = self.create_grid(self.config_window.get_config())
         self.update_battlemap_image()
 
+    def create_grid(self, config):
+        map_rect = self.drawing.map_window.get_relative_rect()
+        return IsometricGrid(config['grid_size_x'], config['grid_size_y'], config['tile_size'],
+                             (map_rect.width, map_rect.height),
+                             origin=(config['grid_origin_x'], config['grid_origin_y']),
+                             isometric_angle=config['isometric_angle'],
+                             rotation=config['rotation'],
+                             pick_buffer=self.pick_buffer)
+
     def update_battlemap_image(self):
         config = self.config_window.get_config()
         scale = config['image_scale']
@@ -202,6 +268,9 @@ class BattlemapGridApp:
             self.drawing.show_entity_labels = self.labels_window.show_entity_labels
             self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
         elif update_type == 'remove_all_entities':
+            for cell, entity in self.entity_tags.items():
+                self.history.record_tag("entity_tags", cell, entity, None)
+            self.history.commit()
             self.entity_tags.clear()
             self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
     def handle_file_dialog(self, event):
@@ -216,42 +285,133 @@ class BattlemapGridApp:
 
     def handle_mouse_down(self, event):
         if event.button == 1:  # Left click
-            self.is_dragging = True
-            self.handle_left_click(event.pos)
+            if self.labels_window.get_active_tool() == "fill":
+                self.handle_fill_click(event.pos)
+            else:
+                self.stroke.begin(self.to_map_position(event.pos))
         elif event.button == 3:  # Right click
             self.handle_right_click(event.pos)
 
     def handle_mouse_motion(self, event):
-        if self.is_dragging:
-            self.handle_left_click(event.pos)
+        if self.stroke.active:
+            self.stroke.add_sample(self.to_map_position(event.pos))
         elif not self.static_highlight:
             self.handle_mouse_hover(event.pos)
 
-    def handle_left_click(self, mouse_pos):
+    def to_map_position(self, mouse_pos):
+        map_rect = self.drawing.map_window.get_relative_rect()
+        if not map_rect.collidepoint(mouse_pos):
+            return None
+        return mouse_pos[0] - map_rect.left, mouse_pos[1] - map_rect.top
+
+    def apply_stroke(self):
+        cells = self.stroke.flush()
+        if self.drawing.grid and cells:
+            if self.labels_window.get_active_tool() in ("rectangle", "lasso"):
+                self.shape_outline.extend(cells)
+                grid = self.drawing.grid
+                last_x, last_y = cells[-1]
+                if 0 <= last_x < grid.width and 0 <= last_y < grid.height:
+                    grid.highlighted_cell = cells[-1]
+                return
+            self.apply_tags(cells)
+        if not self.stroke.active:
+            # The whole stroke becomes a single undo step
+            self.history.commit()
+
+    def finish_shape(self):
+        self.apply_stroke()
+        outline, self.shape_outline = self.shape_outline, []
         if self.drawing.grid:
-            map_rect = self.drawing.map_window.get_relative_rect()
-            iso_x, iso_y = mouse_pos[0] - map_rect.left, mouse_pos[1] - map_rect.top
-            if map_rect.collidepoint(mouse_pos):
-                grid_x, grid_y = self.drawing.grid.screen_to_grid(iso_x, iso_y)
-                if 0 <= grid_x < self.drawing.grid.width and 0 <= grid_y < self.drawing.grid.height:
-                    active_tag = self.labels_window.get_active_tag()
-                    active_entity = self.labels_window.get_active_entity()
-                    if active_tag != "None":
-                        self.tile_tags[(grid_x, grid_y)] = active_tag
-                    else:
-                        self.tile_tags.pop((grid_x, grid_y), None)
-                    
-                    if active_entity != "None":
-                        self.entity_tags[(grid_x, grid_y)] = active_entity
-                        if active_entity not in self.entity_sprites:
-                            sprite_path = self.labels_window.entity_dict[active_entity]
-                            if sprite_path:
-                                self.entity_sprites[active_entity] = pygame.image.load(sprite_path).convert_alpha()
-                    else:
-                        self.entity_tags.pop((grid_x, grid_y), None)
-                    
-                    self.drawing.grid.highlighted_cell = (grid_x, grid_y)
-                    self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
+            grid = self.drawing.grid
+            self.apply_tags(shape_cells(self.labels_window.get_active_tool(), outline, grid.width, grid.height))
+            self.history.commit()
+
+    def handle_fill_click(self, mouse_pos):
+        position = self.to_map_position(mouse_pos)
+        if self.drawing.grid and position:
+            grid = self.drawing.grid
+            # The filled region is bounded by differing terrain tags
+            self.apply_tags(flood_fill(self.tile_tags, grid.screen_to_grid(*position), grid.width, grid.height))
+            self.history.commit()
+
+    def apply_tags(self, cells):
+        """
+        Give `cells` the active terrain tag and entity as one bulk update, followed by a single redraw.
+        """
+        grid = self.drawing.grid
+        cells = [(grid_x, grid_y) for grid_x, grid_y in cells
+                 if 0 <= grid_x < grid.width and 0 <= grid_y < grid.height]
+        if not cells:
+            return
+        active_tag = self.labels_window.get_active_tag()
+        active_entity = self.labels_window.get_active_entity() or "None"
+        if active_entity != "None" and active_entity not in self.entity_sprites:
+            sprite_path = self.labels_window.entity_dict.get(active_entity)
+            if sprite_path:
+                self.entity_sprites[active_entity] = pygame.image.load(sprite_path).convert_alpha()
+
+        new_tag = None if active_tag == "None" else active_tag
+        new_entity = None if active_entity == "None" else active_entity
+        entity_changed = False
+        for cell in cells:
+            self.history.record_tag("tile_tags", cell, self.tile_tags.get(cell), new_tag)
+            if new_tag is None:
+                self.tile_tags.pop(cell, None)
+            else:
+                self.tile_tags[cell] = new_tag
+
+            previous_entity = self.entity_tags.get(cell)
+            self.history.record_tag("entity_tags", cell, previous_entity, new_entity)
+            if new_entity is None:
+                self.entity_tags.pop(cell, None)
+            else:
+                self.entity_tags[cell] = new_entity
+            entity_changed = entity_changed or new_entity != previous_entity
+
+        grid.highlighted_cell = cells[-1]
+        self.drawing.update_cells(self.tile_tags, self.entity_tags, cells, entity_changed)
+
+    def get_grid_parameters(self):
+        parameters = self.config_window.get_config()
+        parameters['image_offset_x'], parameters['image_offset_y'] = self.image_offset
+        return parameters
+
+    def set_grid_parameters(self, parameters):
+        self.config_window.set_config(parameters)
+        self.image_offset = [parameters['image_offset_x'], parameters['image_offset_y']]
+        self.initial_grid_origin = [parameters['grid_origin_x'], parameters['grid_origin_y']]
+        self.update_grid()
+        self.grid_parameters = self.get_grid_parameters()
+
+    def text_entry_focused(self):
+        return any(isinstance(element, pygame_gui.elements.UITextEntryLine)
+                   for element in self.drawing.ui_manager.get_focus_set() or ())
+
+    def record_grid_change(self):
+        parameters = self.get_grid_parameters()
+        self.history.record_grid(self.grid_parameters, parameters)
+        self.grid_parameters = parameters
+
+    def undo(self):
+        self.settle_grid()
+        self.apply_history_edit(self.history.undo(self.tag_layers()), undo=True)
+
+    def redo(self):
+        self.settle_grid()
+        self.apply_history_edit(self.history.redo(self.tag_layers()), undo=False)
+
+    def tag_layers(self):
+        return {"tile_tags": self.tile_tags, "entity_tags": self.entity_tags}
+
+    def apply_history_edit(self, edit, undo):
+        if edit is None:
+            return
+        if edit.grid_change:
+            self.set_grid_parameters(edit.grid_change[0] if undo else edit.grid_change[1])
+        else:
+            self.load_entity_sprites()
+            self.drawing.update_cells(self.tile_tags, self.entity_tags, edit.cells(), bool(edit.tag_diffs.get("entity_tags")))
 
     def handle_right_click(self, mouse_pos):
         self.static_highlight = not self.static_highlight
@@ -270,7 +430,6 @@ class BattlemapGridApp:
                     self.drawing.grid.highlighted_cell = None
             else:
                 self.drawing.grid.highlighted_cell = None
-            self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
 
  
 
@@ -379,11 +538,17 @@ class BattlemapGridApp:
         try:
             config = GridConfig.load(file_path)
             self.apply_config(config)
+            self.history.clear()
+            self.grid_parameters = self.get_grid_parameters()
             print(f"Session loaded from {file_path}")
         except Exception as e:
             print(f"Error loading session: {str(e)}")
 
     def reset_tile_tags(self):
+        for layer, tags in self.tag_layers().items():
+            for cell, tag in tags.items():
+                self.history.record_tag(layer, cell, tag, None)
+        self.history.commit()
         self.tile_tags.clear()
         self.entity_tags.clear()
         self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
@@ -391,6 +556,7 @@ class BattlemapGridApp:
 
     def remove_image(self):
         self.drawing.battlemap = None
+        self.drawing.battlemap_pyramid = None
         self.drawing.resized_battlemap = None
         self.image_path = None
         self.drawing.update_grid_surface(self.tile_tags, self.entity_tags)
@@ -401,4 +567,7 @@ class BattlemapGridApp:
             time_delta = self.clock.tick(60) / 1000.0
             self.handle_events()
             self.drawing.ui_manager.update(time_delta)
+            if self.drawing.grid and self.grid_settle_time is None:
+                # Redraw a stale pick buffer a slice per frame, not on the hovering pick
+                self.pick_buffer.build(self.drawing.grid.lattice)
             self.drawing.draw(self.tile_tags, self.entity_tags)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import pygame
 import pygame_gui
 from isometric_map import IsometricGrid, GridConfig
+from neurorefactor.ui.text_cache import text_cache
 
 class BattlemapWindow:
     def __init__(self, window_size):
@@ -45,13 +46,7 @@ class BattlemapWindow:
         for (grid_x, grid_y), tag in tile_tags.items():
             if tag in self.label_colors:
                 color = self.label_colors[tag]
-                points = [
-                    self.grid.grid_to_screen(grid_x, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y + 1),
-                    self.grid.grid_to_screen(grid_x, grid_y + 1)
-                ]
-                pygame.draw.polygon(self.grid_surface, color, points)
+                pygame.draw.polygon(self.grid_surface, color, self.grid.lattice.polygon(grid_x, grid_y))
 
     def update_battlemap_image(self, scale):
         if self.battlemap:
@@ -67,8 +62,7 @@ class BattlemapWindow:
             if self.grid_surface:
                 self.window_surface.blit(self.grid_surface, (600, 0))
             if self.grid.highlighted_cell:
-                font = pygame.font.Font(None, 36)
-                pos_text = font.render(f"Pos: {self.grid.highlighted_cell}", True, (255, 255, 255))
+                pos_text = text_cache.render(f"Pos: {self.grid.highlighted_cell}")
                 self.window_surface.blit(pos_text, (self.window_size[0] - pos_text.get_width() - 310, 10))
 
         pygame.display.update()
\ No newline at end of file
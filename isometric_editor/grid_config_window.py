@@ -118,23 +118,29 @@ class GridConfigWindow:
         elif event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
             for attr, slider in self.sliders.items():
                 if event.ui_element == slider:
-                    value = int(slider.get_current_value())
-                    self.inputs[attr].set_text(str(value))
-                    if attr in ['grid_origin_x', 'grid_origin_y']:
-                        return attr
+                    # Re-rendering the input box per event is slow while dragging; see sync_inputs
+                    return attr
         elif event.type == pygame_gui.UI_TEXT_ENTRY_FINISHED:
             for attr, input_box in self.inputs.items():
                 if event.ui_element == input_box:
                     try:
                         value = int(input_box.get_text())
                         self.sliders[attr].set_current_value(value)
-                        if attr in ['grid_origin_x', 'grid_origin_y']:
-                            return attr
+                        return attr
                     except ValueError:
                         input_box.set_text(str(int(self.sliders[attr].get_current_value())))
         return None
 
     
+    def sync_inputs(self):
+        """
+        Show the current slider values in the input boxes.
+        """
+        for attr, slider in self.sliders.items():
+            text = str(int(slider.get_current_value()))
+            if self.inputs[attr].get_text() != text:
+                self.inputs[attr].set_text(text)
+
     def get_previous_value(self, attr):
         return self.previous_values.get(attr, 0)
 
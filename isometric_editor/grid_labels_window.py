@@ -1,5 +1,6 @@
 import pygame
 import pygame_gui
+from neurorefactor.tag_fill import FILL_TOOLS
 
 class GridLabelsWindow:
     def __init__(self, manager, rect):
@@ -11,6 +12,8 @@ class GridLabelsWindow:
         )
         self.terrain_buttons = {}
         self.entity_buttons = {}
+        self.tool_buttons = {}
+        self.active_tool = "brush"
         self.active_tag = "floor"
         self.active_entity = None
         self.show_terrain_labels = False
@@ -68,6 +71,18 @@ class GridLabelsWindow:
             self.entity_buttons[entity] = button
             y_offset += button_height + spacing
 
+        # Painting tools, one row above the remove button
+        tool_width = (self.rect.width - 10 - spacing * (len(FILL_TOOLS) - 1)) // len(FILL_TOOLS)
+        tool_y = self.rect.height - 2 * (button_height + spacing)
+        for i, tool in enumerate(FILL_TOOLS):
+            button = pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect(5 + i * (tool_width + spacing), tool_y, tool_width, button_height),
+                text=tool.capitalize(),
+                manager=self.manager,
+                container=self.panel
+            )
+            self.tool_buttons[tool] = button
+
         self.remove_all_entities_button = pygame_gui.elements.UIButton(
             relative_rect=pygame.Rect(5, self.rect.height - button_height - spacing, self.rect.width - 10, button_height),
             text='Remove All Entities',
@@ -83,6 +98,9 @@ class GridLabelsWindow:
             elif event.ui_element in self.entity_buttons.values():
                 self.active_entity = [entity for entity, button in self.entity_buttons.items() if button == event.ui_element][0]
                 return 'entity_selected'
+            elif event.ui_element in self.tool_buttons.values():
+                self.active_tool = [tool for tool, button in self.tool_buttons.items() if button == event.ui_element][0]
+                return 'tool_selected'
             elif event.ui_element == self.toggle_terrain_labels_button:
                 self.show_terrain_labels = not self.show_terrain_labels
                 return 'toggle_terrain_labels'
@@ -97,4 +115,7 @@ class GridLabelsWindow:
         return self.active_tag
 
     def get_active_entity(self):
-        return self.active_entity
\ No newline at end of file
+        return self.active_entity
+
+    def get_active_tool(self):
+        return self.active_tool
@@ -1,8 +1,11 @@
 import math
 import json
-from pydantic import BaseModel, computed_field
-from typing import Tuple, Dict, Union, Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import Tuple, Optional
 import pygame
+from neurorefactor.isometric_projection import IsometricProjection, TileLattice
+from neurorefactor.tile_layer import TileLayer
+from neurorefactor.map_format import BINARY_SUFFIX, load_config_data, save_config
 
 
 class GridConfig(BaseModel):
@@ -15,8 +18,8 @@ class GridConfig(BaseModel):
     rotation: float
     image_path: Optional[str] = None
     image_scale: int = 100
-    tile_tags: Dict[Union[Tuple[int, int], str], str] = {}
-    entity_tags: Dict[Union[Tuple[int, int], str], str] = {}
+    tile_tags: TileLayer = Field(default_factory=TileLayer)
+    entity_tags: TileLayer = Field(default_factory=TileLayer)
     is_bound: bool = False
     image_offset_x: int = 0
     image_offset_y: int = 0
@@ -28,64 +31,26 @@ class GridConfig(BaseModel):
         return (self.image_offset_x, self.image_offset_y) if self.is_bound else (0, 0)
 
     def save(self, file_path: str):
+        if file_path.endswith(BINARY_SUFFIX):
+            save_config(self, file_path)
+            return
+        # Tag layers serialize to {"x,y": tag}
         data = self.model_dump()
-        # Convert all keys to strings for JSON serialization
-        data['tile_tags'] = {f"{k[0]},{k[1]}" if isinstance(k, tuple) else k: v
-                             for k, v in self.tile_tags.items()}
-        data['entity_tags'] = {f"{k[0]},{k[1]}" if isinstance(k, tuple) else k: v
-                               for k, v in self.entity_tags.items()}
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
 
     @classmethod
     def load(cls, file_path: str):
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        # Convert string keys to tuples for tile_tags
-        if 'tile_tags' in data:
-            tile_tags = {}
-            for k, v in data['tile_tags'].items():
-                try:
-                    key_parts = k.split(',')
-                    if len(key_parts) == 2:
-                        x, y = int(key_parts[0]), int(key_parts[1])
-                        tile_tags[(x, y)] = v
-                    else:
-                        tile_tags[k] = v
-                except ValueError:
-                    tile_tags[k] = v
-            data['tile_tags'] = tile_tags
-
-        # Convert string keys to tuples for entity_tags
-        if 'entity_tags' in data:
-            entity_tags = {}
-            for k, v in data['entity_tags'].items():
-                try:
-                    key_parts = k.split(',')
-                    if len(key_parts) == 2:
-                        x, y = int(key_parts[0]), int(key_parts[1])
-                        entity_tags[(x, y)] = v
-                    else:
-                        entity_tags[k] = v
-                except ValueError:
-                    entity_tags[k] = v
-            data['entity_tags'] = entity_tags
-        else:
-            data['entity_tags'] = {}  # Default to empty dict if not present in old saves
-
-        # Set default values for new fields if they're not in the loaded data
-        data.setdefault('is_bound', False)
-        data.setdefault('image_offset_x', 0)
-        data.setdefault('image_offset_y', 0)
-        data.setdefault('show_terrain_labels', False)
-        data.setdefault('show_entity_labels', False)
+        data = load_config_data(file_path)  # binary (.ndmap) or JSON
 
+        # Old saves have no entity_tags or binding fields; the field defaults cover them
         return cls(**data)
 
 
 class IsometricGrid:
-    def __init__(self, width, height, tile_size, window_size, origin=(0, 0), isometric_angle=30, rotation=0):
+    PREVIEW_LINES = 32
+
+    def __init__(self, width, height, tile_size, window_size, origin=(0, 0), isometric_angle=30, rotation=0, pick_buffer=None):
         self.width = width
         self.height = height
         self.tile_size = tile_size
@@ -97,69 +62,74 @@ class IsometricGrid:
         # Calculate the total width and height of the grid in isometric space
         self.iso_width = (self.width + self.height) * math.cos(self.isometric_angle) * self.tile_size
         self.iso_height = (self.width + self.height) * math.sin(self.isometric_angle) * self.tile_size
+        # The grid is centered in the window and shifted by the origin
+        self.projection = IsometricProjection(tile_size, isometric_angle, rotation,
+                                              offset=(origin[0] + window_size[0] // 2, origin[1] + window_size[1] // 2))
+        self.lattice = TileLattice(self.projection, width, height)
+        self.pick_buffer = pick_buffer
 
     def grid_to_screen(self, grid_x, grid_y):
-        # Apply isometric transformation
-        iso_x = (grid_x - grid_y) * math.cos(self.isometric_angle)
-        iso_y = (grid_x + grid_y) * math.sin(self.isometric_angle)
-
-        # Apply rotation
-        rotated_x = iso_x * math.cos(self.rotation) - iso_y * math.sin(self.rotation)
-        rotated_y = iso_x * math.sin(self.rotation) + iso_y * math.cos(self.rotation)
-
-        # Convert to screen position
-        screen_x = rotated_x * self.tile_size + self.origin[0] + self.window_size[0] // 2
-        screen_y = rotated_y * self.tile_size + self.origin[1] + self.window_size[1] // 2
+        screen_x, screen_y = self.projection.grid_to_screen(grid_x, grid_y)
         return int(screen_x), int(screen_y)
 
     def screen_to_grid(self, screen_x, screen_y):
-        # Translate to origin
-        translated_x = screen_x - self.origin[0] - self.window_size[0] // 2
-        translated_y = screen_y - self.origin[1] - self.window_size[1] // 2
-
-        # Unrotate
-        unrotated_x = translated_x * math.cos(-self.rotation) - translated_y * math.sin(-self.rotation)
-        unrotated_y = translated_x * math.sin(-self.rotation) + translated_y * math.cos(-self.rotation)
-
-        # Scale down
-        scaled_x = unrotated_x / self.tile_size
-        scaled_y = unrotated_y / self.tile_size
-
-        # Convert from isometric to grid coordinates
-        grid_y = (scaled_y / math.sin(self.isometric_angle) - scaled_x / math.cos(self.isometric_angle)) / 2
-        grid_x = scaled_y / math.sin(self.isometric_angle) - grid_y
-
-        # Return precise grid coordinates
-        return int(grid_x), int(grid_y)
+        if self.pick_buffer is not None:
+            # The tile drawn under the pixel, exactly as rasterized
+            cell = self.pick_buffer.pick_tile(self.lattice, (screen_x, screen_y))
+            if cell is not None:
+                return cell
+        # Off the grid (or without a pick buffer); floor, so negative coordinates stay off the grid
+        grid_x, grid_y = self.projection.screen_to_grid(screen_x, screen_y)
+        return math.floor(grid_x), math.floor(grid_y)
 
     def is_in_grid(self, screen_x, screen_y):
         grid_x, grid_y = self.screen_to_grid(screen_x, screen_y)
         return 0 <= grid_x < self.width and 0 <= grid_y < self.height
 
     def draw(self, surface):
+        self.draw_lines(surface)
+
+        # Highlight the currently selected cell, if any
+        if self.highlighted_cell:
+            self.highlight_cell(surface, *self.highlighted_cell, (255, 255, 0, 100))
+
+    def draw_lines(self, surface):
         # Draw the vertical lines of the grid
         for x in range(self.width + 1):
-            start = self.grid_to_screen(x, 0)
-            end = self.grid_to_screen(x, self.height)
+            start = self.lattice.vertex(x, 0)
+            end = self.lattice.vertex(x, self.height)
             pygame.draw.line(surface, (0, 0, 0), start, end, 2)
 
         # Draw the horizontal lines of the grid
         for y in range(self.height + 1):
-            start = self.grid_to_screen(0, y)
-            end = self.grid_to_screen(self.width, y)
+            start = self.lattice.vertex(0, y)
+            end = self.lattice.vertex(self.width, y)
             pygame.draw.line(surface, (0, 0, 0), start, end, 2)
 
-        # Highlight the currently selected cell, if any
-        if self.highlighted_cell:
-            self.highlight_cell(surface, *self.highlighted_cell, (255, 255, 0, 100))
+    def draw_preview(self, surface, max_lines=None):
+        """
+        Coarse outline of the grid for live slider previews: at most `max_lines` thin lines per
+        direction, no labels.
+        """
+        max_lines = max_lines or self.PREVIEW_LINES
+        stride = max(1, math.ceil(max(self.width, self.height) / max_lines))
+        for start, end in self.lattice.lines(stride):
+            pygame.draw.line(surface, (0, 0, 0), start, end, 1)
 
     def highlight_cell(self, surface, grid_x, grid_y, color):
-        # Calculate the corners of the cell in screen coordinates
-        points = [
-            self.grid_to_screen(grid_x, grid_y),
-            self.grid_to_screen(grid_x + 1, grid_y),
-            self.grid_to_screen(grid_x + 1, grid_y + 1),
-            self.grid_to_screen(grid_x, grid_y + 1)
-        ]
         # Draw a polygon highlighting the cell
-        pygame.draw.polygon(surface, color, points)
+        pygame.draw.polygon(surface, color, self.lattice.polygon(grid_x, grid_y))
+
+    def highlight_overlay(self, grid_x, grid_y, color):
+        """
+        Return a surface just large enough for the cell's polygon and its top-left position,
+        so the highlight can be blitted over the map without recompositing the map.
+        """
+        points = self.lattice.polygon(grid_x, grid_y)
+        left = min(x for x, _ in points)
+        top = min(y for _, y in points)
+        width = max(x for x, _ in points) - left + 1
+        height = max(y for _, y in points) - top + 1
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.polygon(overlay, color, [(x - left, y - top) for x, y in points])
+        return overlay, (left, top)
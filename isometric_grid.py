@@ -1,5 +1,9 @@
 import pygame
 import math
+import numpy as np
+from neurorefactor.ui.text_cache import text_cache
+
+NO_CUBE, CUBE_UP, CUBE_DOWN = 0, 1, -1
 
 class IsometricGrid:
     def __init__(self, width, height, cell_size):
@@ -15,52 +19,136 @@ class IsometricGrid:
         self.offset_x = (1000 - self.surface_width) // 2
         self.offset_y = (800 - self.surface_height) // 2
         
-        self.surface = pygame.Surface((1000, 800), pygame.SRCALPHA)
-        self.surface.fill((0, 0, 0, 255))  # Black background
-        
-        self.cubes = {}
+        # Height map: each cell's cube direction (up/red, down/blue or none) and height offset in pixels
+        self.directions = np.zeros((width, height), dtype=np.int8)
+        self.heights = np.zeros((width, height), dtype=np.float32)
         self.highlighted_cell = None
         self.angle = 0  # Initial rotation angle
 
-    def draw_grid(self):
-        self.surface.fill((0, 0, 0, 255))  # Clear the surface
+        # The grid and cubes are rasterized once into `layer` (independent of the offset, so panning
+        # is a blit) and afterwards only around cells whose height changed
+        self.layer = None
+        self.layer_key = None
+        self.layer_origin = (0, 0)
+        self.vertices = None
+        self.draw_order = None
+        self.cube_geometry = {}
+        self.dirty_cells = set()
 
-        # Draw grid lines
+    def draw_grid(self):
+        """
+        Bring the cached layer up to date: fully after a rotation, otherwise only the regions
+        around the cells marked dirty.
+        """
+        key = (self.angle, self.cell_size, self.width, self.height)
+        if key != self.layer_key:
+            self.layer_key = key
+            self.rebuild_layer()
+            return
+        if self.dirty_cells:
+            rect = None
+            for cell in self.dirty_cells:
+                old = self.cube_geometry.pop(cell, None)
+                new = self.update_cube_geometry(*cell)
+                for geometry in (old, new):
+                    if geometry:
+                        rect = geometry[0].copy() if rect is None else rect.union(geometry[0])
+            self.dirty_cells.clear()
+            if rect:
+                self.redraw_region(rect)
+
+    def rebuild_layer(self):
+        # Layer coordinates of every lattice vertex, projected once per rotation
+        vertices = np.array([[self.relative_iso(x, y) for y in range(self.height + 1)]
+                             for x in range(self.width + 1)], dtype=np.int32)
+        # Room for the tallest cube above and the deepest below
+        margin = 2 * self.cell_size + 2
+        min_x, min_y = vertices.reshape(-1, 2).min(axis=0)
+        max_x, max_y = vertices.reshape(-1, 2).max(axis=0)
+        self.layer_origin = (2 - int(min_x), margin - int(min_y))
+        self.layer = pygame.Surface((int(max_x - min_x) + 4, int(max_y - min_y) + 2 * margin))
+        self.vertices = vertices + self.layer_origin
+
+        # Back to front: by the screen depth of each cell's centre, the mean of its corners
+        depth = vertices[:-1, :-1, 1] + vertices[1:, :-1, 1] + vertices[1:, 1:, 1] + vertices[:-1, 1:, 1]
+        cells_x = np.repeat(np.arange(self.width), self.height)
+        self.draw_order = np.lexsort((cells_x, depth.ravel()))
+
+        self.cube_geometry = {}
+        self.dirty_cells.clear()
+        for index in self.cubes_in_order():
+            self.update_cube_geometry(*divmod(int(index), self.height))
+        self.redraw_region(self.layer.get_rect())
+
+    def redraw_region(self, rect):
+        """
+        Re-rasterize `rect` of the layer: the grid lines, then the cubes overlapping it back to front.
+        """
+        self.layer.set_clip(rect)
+        self.layer.fill((0, 0, 0))
         for x in range(self.width + 1):
-            for y in range(self.height + 1):
-                if (x, y) not in self.cubes:
-                    if x < self.width:
-                        start = self.grid_to_iso(x, y)
-                        end = self.grid_to_iso(x + 1, y)
-                        pygame.draw.line(self.surface, (255, 255, 255), start, end)
-                    if y < self.height:
-                        start = self.grid_to_iso(x, y)
-                        end = self.grid_to_iso(x, y + 1)
-                        pygame.draw.line(self.surface, (255, 255, 255), start, end)
-
-        # Cover areas below blue cubes with black surfaces
-        for (grid_x, grid_y), (draw_up, z_offset) in self.cubes.items():
-            if not draw_up:
-                self.cover_cube_with_black(grid_x, grid_y, draw_up, z_offset, below=True)
-        
-        # Cover areas above blue cubes and below red cubes with black surfaces
-        for (grid_x, grid_y), (draw_up, z_offset) in self.cubes.items():
-            self.cover_cube_with_black(grid_x, grid_y, draw_up, z_offset, middle=True)
-
-        # Draw blue cubes
-        for (grid_x, grid_y), (draw_up, z_offset) in self.cubes.items():
-            if not draw_up:
-                self.draw_cube(grid_x, grid_y, draw_up, z_offset)
-
-        # Cover areas above red cubes with black surfaces
-        for (grid_x, grid_y), (draw_up, z_offset) in self.cubes.items():
-            if draw_up:
-                self.cover_cube_with_black(grid_x, grid_y, draw_up, z_offset, above=True)
-
-        # Draw red cubes
-        for (grid_x, grid_y), (draw_up, z_offset) in self.cubes.items():
-            if draw_up:
-                self.draw_cube(grid_x, grid_y, draw_up, z_offset)
+            pygame.draw.line(self.layer, (255, 255, 255), self.layer_point(x, 0), self.layer_point(x, self.height))
+        for y in range(self.height + 1):
+            pygame.draw.line(self.layer, (255, 255, 255), self.layer_point(0, y), self.layer_point(self.width, y))
+        for index in self.cubes_in_order():
+            geometry = self.cube_geometry.get(divmod(int(index), self.height))
+            if geometry and geometry[0].colliderect(rect):
+                self.draw_cube(geometry)
+        self.layer.set_clip(None)
+
+    def cubes_in_order(self):
+        return self.draw_order[self.directions.ravel()[self.draw_order] != NO_CUBE]
+
+    def relative_iso(self, grid_x, grid_y):
+        iso_x, iso_y = self.grid_to_iso(grid_x, grid_y)
+        return iso_x - self.offset_x, iso_y - self.offset_y
+
+    def layer_point(self, grid_x, grid_y):
+        x, y = self.vertices[grid_x, grid_y]
+        return int(x), int(y)
+
+    def update_cube_geometry(self, grid_x, grid_y):
+        """
+        Cache the cube's outline (bounding rect, silhouette, visible edges, colour) in layer coordinates.
+        """
+        direction = self.directions[grid_x, grid_y]
+        if direction == NO_CUBE:
+            self.cube_geometry.pop((grid_x, grid_y), None)
+            return None
+        base = [self.layer_point(grid_x, grid_y), self.layer_point(grid_x + 1, grid_y),
+                self.layer_point(grid_x + 1, grid_y + 1), self.layer_point(grid_x, grid_y + 1)]
+        z_offset = float(self.heights[grid_x, grid_y])
+        # Red cubes rise from the grid plane, blue ones hang below it
+        top_shift, bottom_shift = (-z_offset, 0) if direction == CUBE_UP else (0, z_offset)
+        top = [(x, y + top_shift) for x, y in base]
+        bottom = [(x, y + bottom_shift) for x, y in base]
+
+        # Seen from above: the far corner's vertical edge and its two bottom edges are hidden
+        left = min(range(4), key=lambda i: base[i][0])
+        right = max(range(4), key=lambda i: base[i][0])
+        near = max(range(4), key=lambda i: base[i][1])
+        far = min(range(4), key=lambda i: base[i][1])
+        silhouette = [top[left], top[far], top[right], bottom[right], bottom[near], bottom[left]]
+        edges = [(top[i], bottom[i]) for i in (left, near, right)]
+        bottom_edge = [bottom[left], bottom[near], bottom[right]]
+        color = (255, 0, 0) if direction == CUBE_UP else (0, 0, 255)
+
+        xs = [x for x, _ in silhouette]
+        ys = [y for _, y in silhouette]
+        rect = pygame.Rect(math.floor(min(xs)) - 1, math.floor(min(ys)) - 1,
+                           math.ceil(max(xs) - min(xs)) + 3, math.ceil(max(ys) - min(ys)) + 3)
+        geometry = (rect, silhouette, top, edges, bottom_edge, color)
+        self.cube_geometry[(grid_x, grid_y)] = geometry
+        return geometry
+
+    def draw_cube(self, geometry):
+        _, silhouette, top, edges, bottom_edge, color = geometry
+        # Filling the silhouette hides the grid and any cube behind this one
+        pygame.draw.polygon(self.layer, (0, 0, 0), silhouette)
+        for start, end in edges:
+            pygame.draw.line(self.layer, color, start, end, 1)
+        pygame.draw.lines(self.layer, color, False, bottom_edge, 1)
+        pygame.draw.lines(self.layer, color, True, top, 1)
 
     def grid_to_iso(self, grid_x, grid_y):
         # Center of the grid
@@ -124,97 +212,41 @@ class IsometricGrid:
         grid_x, grid_y = self.iso_to_grid(iso_x, iso_y)
         return 0 <= grid_x < self.width and 0 <= grid_y < self.height
 
-    def highlight_cell(self, grid_x, grid_y, color):
+    def highlight_cell(self, screen, grid_x, grid_y, color):
         points = [
             self.grid_to_iso(grid_x, grid_y),
             self.grid_to_iso(grid_x + 1, grid_y),
             self.grid_to_iso(grid_x + 1, grid_y + 1),
             self.grid_to_iso(grid_x, grid_y + 1)
         ]
-        pygame.draw.polygon(self.surface, color, points)
-
-    def cover_grid_with_black(self, grid_x, grid_y):
-        points = [
-            self.grid_to_iso(grid_x, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y + 1),
-            self.grid_to_iso(grid_x, grid_y + 1)
-        ]
-        pygame.draw.polygon(self.surface, (0, 0, 0), points)
-
-    def cover_cube_with_black(self, grid_x, grid_y, draw_up, z_offset, below=False, middle=False, above=False):
-        top_points = [
-            self.grid_to_iso(grid_x, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y + 1),
-            self.grid_to_iso(grid_x, grid_y + 1)
-        ]
-
-        vertical_offset = -self.cell_size if draw_up else self.cell_size
-        vertical_offset *= z_offset / self.cell_size  # Adjust based on z_offset
-
-        # Draw black square on the bottom face for blue cubes
-        if below:
-            bottom_square_points = [
-                (top_points[0][0], top_points[0][1] + vertical_offset),
-                (top_points[1][0], top_points[1][1] + vertical_offset),
-                (top_points[2][0], top_points[2][1] + vertical_offset),
-                (top_points[3][0], top_points[3][1] + vertical_offset)
-            ]
-            pygame.draw.polygon(self.surface, (0, 0, 0), bottom_square_points)
-
-        # Draw black square on the top face for blue cubes and bottom face for red cubes
-        if middle:
-            middle_square_points = [
-                (top_points[0][0], top_points[0][1]),
-                (top_points[1][0], top_points[1][1]),
-                (top_points[2][0], top_points[2][1]),
-                (top_points[3][0], top_points[3][1])
-            ]
-            pygame.draw.polygon(self.surface, (0, 0, 0), middle_square_points)
-
-        # Draw black square on the top face for red cubes
-        if above:
-            above_square_points = [
-                (top_points[0][0], top_points[0][1] + vertical_offset),
-                (top_points[1][0], top_points[1][1] + vertical_offset),
-                (top_points[2][0], top_points[2][1] + vertical_offset),
-                (top_points[3][0], top_points[3][1] + vertical_offset)
-            ]
-            pygame.draw.polygon(self.surface, (0, 0, 0), above_square_points)
-
-    def draw_cube(self, grid_x, grid_y, draw_up, z_offset):
-        top_points = [
-            self.grid_to_iso(grid_x, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y),
-            self.grid_to_iso(grid_x + 1, grid_y + 1),
-            self.grid_to_iso(grid_x, grid_y + 1)
-        ]
-
-        vertical_offset = -self.cell_size if draw_up else self.cell_size
-        vertical_offset *= z_offset / self.cell_size  # Adjust based on z_offset
-
-        cube_color = (255, 0, 0) if draw_up else (0, 0, 255)
-
-        bottom_points = [(point[0], point[1] + vertical_offset) for point in top_points]
-        for i in range(4):
-            pygame.draw.line(self.surface, cube_color, top_points[i], bottom_points[i], 1)
-        pygame.draw.lines(self.surface, cube_color, True, bottom_points, 1)
-
-        pygame.draw.lines(self.surface, cube_color, True, top_points, 1)
+        # Blend the translucent colour through a small overlay
+        rect = pygame.Rect(min(x for x, _ in points), min(y for _, y in points), 1, 1)
+        rect.width = max(x for x, _ in points) - rect.x + 1
+        rect.height = max(y for _, y in points) - rect.y + 1
+        overlay = pygame.Surface(rect.size, pygame.SRCALPHA)
+        pygame.draw.polygon(overlay, color, [(x - rect.x, y - rect.y) for x, y in points])
+        screen.blit(overlay, rect)
+
+    def get_cube(self, grid_x, grid_y):
+        """
+        (draw_up, z_offset) of the cube on the cell, or None.
+        """
+        direction = self.directions[grid_x, grid_y]
+        if direction == NO_CUBE:
+            return None
+        return direction == CUBE_UP, float(self.heights[grid_x, grid_y])
 
     def render(self, screen):
         self.draw_grid()
+        screen.blit(self.layer, (self.offset_x - self.layer_origin[0], self.offset_y - self.layer_origin[1]))
 
         if self.highlighted_cell:
-            self.highlight_cell(*self.highlighted_cell, (255, 255, 0, 100))
-
-        screen.blit(self.surface, (0, 0))
+            self.highlight_cell(screen, *self.highlighted_cell, (255, 255, 0, 100))
 
-        if self.highlighted_cell and self.highlighted_cell in self.cubes:
-            _, z_offset = self.cubes[self.highlighted_cell]
-            font = pygame.font.Font(None, 36)
-            height_text = font.render(f"Height offset: {z_offset:.2f}", True, (255, 255, 255))
+        cube = self.get_cube(*self.highlighted_cell) if self.highlighted_cell else None
+        if cube:
+            _, z_offset = cube
+            height_text = text_cache.render(f"Height offset: {z_offset:.2f}")
             screen.blit(height_text, (screen.get_width() - height_text.get_width() - 10, screen.get_height() - height_text.get_height() - 10))
 
     def move_grid(self, dx, dy):
@@ -222,16 +254,21 @@ class IsometricGrid:
         self.offset_y += dy
 
     def toggle_cube(self, grid_x, grid_y, draw_up):
-        if (grid_x, grid_y) in self.cubes:
-            del self.cubes[(grid_x, grid_y)]
+        if self.directions[grid_x, grid_y] != NO_CUBE:
+            self.directions[grid_x, grid_y] = NO_CUBE
+            self.heights[grid_x, grid_y] = 0
         else:
-            self.cubes[(grid_x, grid_y)] = (draw_up, 0.5 * self.cell_size)  # Initialize at 0.5 height
+            self.directions[grid_x, grid_y] = CUBE_UP if draw_up else CUBE_DOWN
+            self.heights[grid_x, grid_y] = 0.5 * self.cell_size  # Initialize at 0.5 height
+        self.dirty_cells.add((grid_x, grid_y))
 
     def adjust_cube_height(self, grid_x, grid_y, delta):
-        if (grid_x, grid_y) in self.cubes:
-            draw_up, z_offset = self.cubes[(grid_x, grid_y)]
+        if self.directions[grid_x, grid_y] != NO_CUBE:
+            z_offset = self.heights[grid_x, grid_y]
             z_offset = min(max(0, z_offset + delta), 2 * self.cell_size)  # Ensure height offset is between 0 and 2 times the cell size
-            self.cubes[(grid_x, grid_y)] = (draw_up, z_offset)
+            if z_offset != self.heights[grid_x, grid_y]:
+                self.heights[grid_x, grid_y] = z_offset
+                self.dirty_cells.add((grid_x, grid_y))
 
 def main():
     pygame.init()
@@ -286,8 +323,7 @@ def main():
         grid.render(screen)
 
         if grid.highlighted_cell:
-            font = pygame.font.Font(None, 36)
-            pos_text = font.render(f"Pos: {grid.highlighted_cell}", True, (255, 255, 255))
+            pos_text = text_cache.render(f"Pos: {grid.highlighted_cell}")
             screen.blit(pos_text, (screen.get_width() - pos_text.get_width() - 10, 10))
 
         pygame.display.flip()
@@ -3,9 +3,19 @@ import pygame_gui
 import math
 import json
 import os
+import time
 from pygame_gui.windows import UIFileDialog
-from pydantic import BaseModel
-from typing import Tuple, Dict, Union, Optional
+from pydantic import BaseModel, Field
+from typing import Optional
+from neurorefactor.isometric_projection import IsometricProjection, TileLattice
+from neurorefactor.stroke import Stroke
+from neurorefactor.tag_fill import FILL_TOOLS, flood_fill, shape_cells
+from neurorefactor.edit_history import EditHistory
+from neurorefactor.tile_layer import TileLayer
+from neurorefactor.map_format import BINARY_SUFFIX, load_config_data, save_config
+from neurorefactor.ui.image_pyramid import ImagePyramid
+from neurorefactor.ui.pick_buffer import PickBuffer
+from neurorefactor.ui.text_cache import text_cache
 
 class GridConfig(BaseModel):
     tile_size: int
@@ -17,38 +27,28 @@ class GridConfig(BaseModel):
     rotation: float
     image_path: Optional[str] = None
     image_scale: int = 100
-    tile_tags: Dict[Union[Tuple[int, int], str], str] = {}
+    tile_tags: TileLayer = Field(default_factory=TileLayer)
 
     def save(self, file_path: str):
+        if file_path.endswith(BINARY_SUFFIX):
+            save_config(self, file_path)
+            return
+        # The tag layer serializes to {"x,y": tag}
         data = self.model_dump()
-        # Convert all keys to strings for JSON serialization
-        data['tile_tags'] = {f"{k[0]},{k[1]}" if isinstance(k, tuple) else k: v 
-                             for k, v in self.tile_tags.items()}
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
 
     @classmethod
     def load(cls, file_path: str):
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        # Convert string keys to tuples
-        if 'tile_tags' in data:
-            tile_tags = {}
-            for k, v in data['tile_tags'].items():
-                try:
-                    key_parts = k.split(',')
-                    if len(key_parts) >= 2:
-                        x, y = int(key_parts[0]), int(key_parts[1])
-                        tile_tags[(x, y)] = v
-                    else:
-                        print(f"Skipping malformed tile tag key: {k}")
-                except ValueError:
-                    print(f"Skipping invalid tile tag key: {k}")
-            data['tile_tags'] = tile_tags
+        data = load_config_data(file_path)  # binary (.ndmap) or JSON
         return cls(**data)
 
+GRID_PARAMETERS = ['image_scale', 'tile_size', 'grid_size_x', 'grid_size_y', 'grid_origin_x', 'grid_origin_y', 'isometric_angle', 'rotation']
+
 class IsometricGrid:
-    def __init__(self, width, height, tile_size, window_size, origin=(0, 0), isometric_angle=30, rotation=0):
+    PREVIEW_LINES = 32
+
+    def __init__(self, width, height, tile_size, window_size, origin=(0, 0), isometric_angle=30, rotation=0, pick_buffer=None):
         self.width = width
         self.height = height
         self.tile_size = tile_size
@@ -57,36 +57,24 @@ class IsometricGrid:
         self.isometric_angle = math.radians(isometric_angle)
         self.rotation = math.radians(rotation)
         self.highlighted_cell = None
+        self.projection = IsometricProjection(tile_size, isometric_angle, rotation,
+                                              offset=(origin[0] + window_size[0] // 2, origin[1] + window_size[1] // 2))
+        self.lattice = TileLattice(self.projection, width, height)
+        self.pick_buffer = pick_buffer
 
     def grid_to_screen(self, grid_x, grid_y):
-        iso_x = (grid_x - grid_y) * math.cos(self.isometric_angle)
-        iso_y = (grid_x + grid_y) * math.sin(self.isometric_angle)
-        
-        rotated_x = iso_x * math.cos(self.rotation) - iso_y * math.sin(self.rotation)
-        rotated_y = iso_x * math.sin(self.rotation) + iso_y * math.cos(self.rotation)
-        
-        screen_x = rotated_x * self.tile_size + self.origin[0] + self.window_size[0] // 2
-        screen_y = rotated_y * self.tile_size + self.origin[1] + self.window_size[1] // 2
+        screen_x, screen_y = self.projection.grid_to_screen(grid_x, grid_y)
         return int(screen_x), int(screen_y)
 
     def screen_to_grid(self, screen_x, screen_y):
-        # Translate to origin
-        translated_x = screen_x - self.origin[0] - self.window_size[0] // 2
-        translated_y = screen_y - self.origin[1] - self.window_size[1] // 2
-        
-        # Unrotate
-        unrotated_x = translated_x * math.cos(-self.rotation) - translated_y * math.sin(-self.rotation)
-        unrotated_y = translated_x * math.sin(-self.rotation) + translated_y * math.cos(-self.rotation)
-        
-        # Scale down
-        scaled_x = unrotated_x / self.tile_size
-        scaled_y = unrotated_y / self.tile_size
-        
-        # Convert from isometric to grid coordinates
-        grid_y = (scaled_y / math.sin(self.isometric_angle) - scaled_x / math.cos(self.isometric_angle)) / 2
-        grid_x = scaled_y / math.sin(self.isometric_angle) - grid_y
-        
-        return round(grid_x), round(grid_y)
+        if self.pick_buffer is not None:
+            # The tile drawn under the pixel, exactly as rasterized
+            cell = self.pick_buffer.pick_tile(self.lattice, (screen_x, screen_y))
+            if cell is not None:
+                return cell
+        # Off the grid (or without a pick buffer): the cell (x, y) spans [x, x + 1) x [y, y + 1)
+        grid_x, grid_y = self.projection.screen_to_grid(screen_x, screen_y)
+        return math.floor(grid_x), math.floor(grid_y)
 
     def is_in_grid(self, screen_x, screen_y):
         grid_x, grid_y = self.screen_to_grid(screen_x, screen_y)
@@ -94,28 +82,45 @@ class IsometricGrid:
 
     def draw(self, surface):
         for x in range(self.width + 1):
-            start = self.grid_to_screen(x, 0)
-            end = self.grid_to_screen(x, self.height)
+            start = self.lattice.vertex(x, 0)
+            end = self.lattice.vertex(x, self.height)
             pygame.draw.line(surface, (0, 0, 0), start, end, 2)
 
         for y in range(self.height + 1):
-            start = self.grid_to_screen(0, y)
-            end = self.grid_to_screen(self.width, y)
+            start = self.lattice.vertex(0, y)
+            end = self.lattice.vertex(self.width, y)
             pygame.draw.line(surface, (0, 0, 0), start, end, 2)
 
-        if self.highlighted_cell:
-            self.highlight_cell(surface, *self.highlighted_cell, (255, 255, 0, 100))
+    def draw_preview(self, surface, max_lines=None):
+        """
+        Coarse outline of the grid for live slider previews: at most `max_lines` thin lines per
+        direction, no labels.
+        """
+        max_lines = max_lines or self.PREVIEW_LINES
+        stride = max(1, math.ceil(max(self.width, self.height) / max_lines))
+        for start, end in self.lattice.lines(stride):
+            pygame.draw.line(surface, (0, 0, 0), start, end, 1)
 
     def highlight_cell(self, surface, grid_x, grid_y, color):
-        points = [
-            self.grid_to_screen(grid_x, grid_y),
-            self.grid_to_screen(grid_x + 1, grid_y),
-            self.grid_to_screen(grid_x + 1, grid_y + 1),
-            self.grid_to_screen(grid_x, grid_y + 1)
-        ]
-        pygame.draw.polygon(surface, color, points)
+        pygame.draw.polygon(surface, color, self.lattice.polygon(grid_x, grid_y))
+
+    def highlight_overlay(self, grid_x, grid_y, color):
+        """
+        Return a surface just large enough for the cell's polygon and its top-left position,
+        so the highlight can be blitted over the map without redrawing the map.
+        """
+        points = self.lattice.polygon(grid_x, grid_y)
+        left = min(x for x, _ in points)
+        top = min(y for _, y in points)
+        width = max(x for x, _ in points) - left + 1
+        height = max(y for _, y in points) - top + 1
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.polygon(overlay, color, [(x - left, y - top) for x, y in points])
+        return overlay, (left, top)
 
 class BattlemapGridApp:
+    SLIDER_SETTLE_SECONDS = 0.2
+
     def __init__(self):
         pygame.init()
         pygame.display.set_caption('DnD Isometric Grid App')
@@ -125,18 +130,29 @@ class BattlemapGridApp:
 
         self.background = pygame.Surface(self.window_size)
         self.background.fill(self.ui_manager.ui_theme.get_colour('dark_bg'))
-        self.is_dragging = False
+        self.stroke = Stroke(lambda x, y: self.grid.screen_to_grid(x, y))
         self.grid = None
+        # Tile ids under each map pixel, shared by every grid this app creates
+        self.pick_buffer = None
         self.grid_surface = None
+        # Hover highlight, drawn over grid_surface at composite time
+        self.highlight_overlay = None
+        self.highlight_overlay_key = None
         self.battlemap = None
+        self.battlemap_pyramid = None
         self.resized_battlemap = None
+        # Set while a grid slider is dragged: the full redraw waits until it settles
+        self.grid_settle_time = None
+        self.preview_parameters = None
         self.image_path = None
         self.load_battlemap_dialog = None
         self.save_session_dialog = None
         self.load_session_dialog = None
 
-        self.tile_tags = {}
+        self.tile_tags = TileLayer()
         self.active_tag = "floor"
+        self.active_tool = "brush"
+        self.shape_outline = []
         self.static_highlight = False
 
         self.show_labels = False
@@ -150,6 +166,8 @@ class BattlemapGridApp:
         self.setup_ui()
         self.initialize_grid()
         self.starting_config = self.get_current_config()
+        self.history = EditHistory()
+        self.grid_parameters = self.get_grid_parameters()
 
         self.clock = pygame.time.Clock()
         self.is_running = True
@@ -242,6 +260,19 @@ class BattlemapGridApp:
             container=self.tag_window
         )
 
+        # Add painting tool buttons
+        y_offset += button_height + 30
+        self.tool_buttons = {}
+        for tool in FILL_TOOLS:
+            button = pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect(10, y_offset, tag_window_width - 20, button_height),
+                text=tool.capitalize(),
+                manager=self.ui_manager,
+                container=self.tag_window
+            )
+            self.tool_buttons[tool] = button
+            y_offset += button_height + 10
+
         # Add remove image and reset battlemap buttons
         button_width = 200
         button_height = 40
@@ -298,7 +329,9 @@ class BattlemapGridApp:
         self.grid_size_x_input.set_text(str(grid_width))
         self.grid_size_y_slider.set_current_value(grid_height)
         self.grid_size_y_input.set_text(str(grid_height))
-        self.grid = IsometricGrid(grid_width, grid_height, initial_tile_size, (map_rect.width, map_rect.height))
+        self.pick_buffer = PickBuffer(map_rect.size)
+        self.grid = IsometricGrid(grid_width, grid_height, initial_tile_size, (map_rect.width, map_rect.height),
+                                  pick_buffer=self.pick_buffer)
         self.update_grid_surface()
 
     def update_grid_surface(self):
@@ -313,17 +346,25 @@ class BattlemapGridApp:
 
             self.map_window.set_image(self.grid_surface)
 
+    def draw_highlight(self):
+        if not self.grid.highlighted_cell:
+            return
+        key = (self.grid, self.grid.highlighted_cell)
+        if key != self.highlight_overlay_key:
+            self.highlight_overlay = self.grid.highlight_overlay(*self.grid.highlighted_cell, (255, 255, 0, 100))
+            self.highlight_overlay_key = key
+        overlay, (left, top) = self.highlight_overlay
+        map_rect = self.map_window.get_relative_rect()
+        previous_clip = self.window_surface.get_clip()
+        self.window_surface.set_clip(map_rect)
+        self.window_surface.blit(overlay, (map_rect.left + left, map_rect.top + top))
+        self.window_surface.set_clip(previous_clip)
+
     def draw_labeled_cells(self):
         for (grid_x, grid_y), tag in self.tile_tags.items():
             if tag in self.label_colors:
                 color = self.label_colors[tag]
-                points = [
-                    self.grid.grid_to_screen(grid_x, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y),
-                    self.grid.grid_to_screen(grid_x + 1, grid_y + 1),
-                    self.grid.grid_to_screen(grid_x, grid_y + 1)
-                ]
-                pygame.draw.polygon(self.grid_surface, color, points)
+                pygame.draw.polygon(self.grid_surface, color, self.grid.lattice.polygon(grid_x, grid_y))
                 
     def handle_events(self):
         for event in pygame.event.get():
@@ -339,23 +380,34 @@ class BattlemapGridApp:
                     self.load_session()
                 elif event.ui_element in self.tag_buttons.values():
                     self.active_tag = [tag for tag, button in self.tag_buttons.items() if button == event.ui_element][0]
+                elif event.ui_element in self.tool_buttons.values():
+                    self.active_tool = [tool for tool, button in self.tool_buttons.items() if button == event.ui_element][0]
                 elif event.ui_element == self.reset_dict_button:
                     self.reset_tile_tags()
                 elif event.ui_element == self.remove_image_button:
                     self.remove_image()
                 elif event.ui_element == self.reset_battlemap_button:
                     self.initialize_grid()
+                    self.record_grid_change()
                 elif event.ui_element == self.toggle_labels_button:
                     self.show_labels = not self.show_labels
                     self.update_grid_surface()
 
             if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
-                self.update_slider_value(event.ui_element)
-                self.update_grid()
+                # The input boxes are synced once per frame in update_grid_preview
+                self.grid_settle_time = time.monotonic() + self.SLIDER_SETTLE_SECONDS
 
             if event.type == pygame_gui.UI_TEXT_ENTRY_FINISHED:
                 self.update_input_value(event.ui_element)
                 self.update_grid()
+                self.record_grid_change()
+
+            # Ctrl+Z in a text box belongs to the text box, not to the map
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and not self.text_entry_focused():
+                if event.key == pygame.K_z and not event.mod & pygame.KMOD_SHIFT:
+                    self.undo()
+                elif event.key in (pygame.K_y, pygame.K_z):
+                    self.redo()
 
             if event.type == pygame_gui.UI_FILE_DIALOG_PATH_PICKED:
                 if event.ui_element == self.load_battlemap_dialog:
@@ -369,23 +421,67 @@ class BattlemapGridApp:
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
-                    self.is_dragging = True
-                    self.handle_left_click(event.pos)
+                    if self.active_tool == "fill":
+                        self.handle_fill_click(event.pos)
+                    else:
+                        self.stroke.begin(self.to_map_position(event.pos))
                 elif event.button == 3:  # Right click
                     self.handle_right_click(event.pos)
 
             if event.type == pygame.MOUSEBUTTONUP:
-                if event.button == 1:  # Left click release
-                    self.is_dragging = False
+                if event.button == 1 and self.stroke.active:  # Left click release
+                    self.stroke.end()
+                    if self.active_tool in ("rectangle", "lasso"):
+                        self.finish_shape()
 
             if event.type == pygame.MOUSEMOTION:
-                if self.is_dragging:
-                    self.handle_left_click(event.pos)
+                if self.stroke.active:
+                    self.stroke.add_sample(self.to_map_position(event.pos))
                 elif not self.static_highlight:
                     self.handle_mouse_motion(event.pos)
 
             self.ui_manager.process_events(event)
 
+        # Paint everything the stroke covered since the last frame in one go
+        self.apply_stroke()
+        self.update_grid_preview()
+
+    def update_grid_preview(self):
+        """
+        While a slider is dragged, redraw at most a coarse preview per frame, however many slider
+        events arrived; once it has been still for SLIDER_SETTLE_SECONDS, do the full redraw.
+        """
+        if self.grid_settle_time is None:
+            return
+        if time.monotonic() >= self.grid_settle_time:
+            self.settle_grid()
+            return
+        parameters = self.get_grid_parameters()
+        if parameters == self.preview_parameters:
+            return
+        self.preview_parameters = parameters
+        self.sync_inputs()
+        self.grid = self.create_grid()
+        self.resize_battlemap(smooth=False)
+        size = self.map_window.get_relative_rect().size
+        if self.grid_surface is None or self.grid_surface.get_size() != size:
+            self.grid_surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.grid_surface.fill((0, 0, 0, 0))
+        if self.resized_battlemap:
+            self.grid_surface.blit(self.resized_battlemap, (0, 0))
+        # run() blits grid_surface directly; the map window's copy is refreshed on settling
+        self.grid.draw_preview(self.grid_surface)
+
+    def settle_grid(self):
+        if self.grid_settle_time is None:
+            return
+        self.grid_settle_time = None
+        self.preview_parameters = None
+        self.sync_inputs()
+        self.resize_battlemap()
+        self.update_grid()
+        self.record_grid_change()
+
 
     def handle_mouse_motion(self, mouse_pos):
         if self.grid:
@@ -399,22 +495,94 @@ class BattlemapGridApp:
                     self.grid.highlighted_cell = None
             else:
                 self.grid.highlighted_cell = None
-            self.update_grid_surface()
     
-    def handle_left_click(self, mouse_pos):
+    def to_map_position(self, mouse_pos):
+        map_rect = self.map_window.get_relative_rect()
+        if not map_rect.collidepoint(mouse_pos):
+            return None
+        return mouse_pos[0] - map_rect.left, mouse_pos[1] - map_rect.top
+
+    def apply_stroke(self):
+        cells = self.stroke.flush()
+        if self.grid and cells:
+            if self.active_tool in ("rectangle", "lasso"):
+                self.shape_outline.extend(cells)
+                last_x, last_y = cells[-1]
+                if 0 <= last_x < self.grid.width and 0 <= last_y < self.grid.height:
+                    self.grid.highlighted_cell = cells[-1]
+                return
+            self.apply_tags(cells)
+        if not self.stroke.active:
+            # The whole stroke becomes a single undo step
+            self.history.commit()
+
+    def finish_shape(self):
+        self.apply_stroke()
+        outline, self.shape_outline = self.shape_outline, []
         if self.grid:
-            map_rect = self.map_window.get_relative_rect()
-            iso_x, iso_y = mouse_pos[0] - map_rect.left, mouse_pos[1] - map_rect.top
-            if map_rect.collidepoint(mouse_pos):
-                grid_x, grid_y = self.grid.screen_to_grid(iso_x, iso_y)
-                if 0 <= grid_x < self.grid.width and 0 <= grid_y < self.grid.height:
-                    if self.active_tag == "None":
-                        self.tile_tags.pop((grid_x, grid_y), None)
-                    else:
-                        self.tile_tags[(grid_x, grid_y)] = self.active_tag
-                    self.grid.highlighted_cell = (grid_x, grid_y)
-                    self.update_grid_surface()
+            self.apply_tags(shape_cells(self.active_tool, outline, self.grid.width, self.grid.height))
+            self.history.commit()
+
+    def handle_fill_click(self, mouse_pos):
+        position = self.to_map_position(mouse_pos)
+        if self.grid and position:
+            # The filled region is bounded by differing tags
+            self.apply_tags(flood_fill(self.tile_tags, self.grid.screen_to_grid(*position), self.grid.width, self.grid.height))
+            self.history.commit()
+
+    def apply_tags(self, cells):
+        """
+        Give `cells` the active tag as one bulk update, followed by a single redraw.
+        """
+        cells = [(grid_x, grid_y) for grid_x, grid_y in cells
+                 if 0 <= grid_x < self.grid.width and 0 <= grid_y < self.grid.height]
+        if not cells:
+            return
+        new_tag = None if self.active_tag == "None" else self.active_tag
+        for cell in cells:
+            self.history.record_tag("tile_tags", cell, self.tile_tags.get(cell), new_tag)
+            if new_tag is None:
+                self.tile_tags.pop(cell, None)
+            else:
+                self.tile_tags[cell] = new_tag
+        self.grid.highlighted_cell = cells[-1]
+        self.update_grid_surface()
+
+    def get_grid_parameters(self):
+        return {attr: int(getattr(self, f'{attr}_slider').get_current_value()) for attr in GRID_PARAMETERS}
+
+    def set_grid_parameters(self, parameters):
+        for attr, value in parameters.items():
+            getattr(self, f'{attr}_slider').set_current_value(value)
+            getattr(self, f'{attr}_input').set_text(str(value))
+        self.resize_battlemap()
+        self.update_grid()
+        self.grid_parameters = self.get_grid_parameters()
+
+    def text_entry_focused(self):
+        return any(isinstance(element, pygame_gui.elements.UITextEntryLine)
+                   for element in self.ui_manager.get_focus_set() or ())
+
+    def record_grid_change(self):
+        parameters = self.get_grid_parameters()
+        self.history.record_grid(self.grid_parameters, parameters)
+        self.grid_parameters = parameters
+
+    def undo(self):
+        self.settle_grid()
+        edit = self.history.undo({"tile_tags": self.tile_tags})
+        if edit:
+            if edit.grid_change:
+                self.set_grid_parameters(edit.grid_change[0])
+            self.update_grid_surface()
 
+    def redo(self):
+        self.settle_grid()
+        edit = self.history.redo({"tile_tags": self.tile_tags})
+        if edit:
+            if edit.grid_change:
+                self.set_grid_parameters(edit.grid_change[1])
+            self.update_grid_surface()
 
     def handle_right_click(self, mouse_pos):
         self.static_highlight = not self.static_highlight
@@ -431,52 +599,53 @@ class BattlemapGridApp:
             allow_existing_files_only=True,
             allowed_suffixes={".png", ".jpg", ".jpeg"}
         )
-    def update_slider_value(self, slider):
-        for attr in ['image_scale', 'tile_size', 'grid_size_x', 'grid_size_y', 'grid_origin_x', 'grid_origin_y', 'isometric_angle', 'rotation']:
-            if slider == getattr(self, f'{attr}_slider'):
-                value = int(slider.get_current_value())
-                getattr(self, f'{attr}_input').set_text(str(value))
-                if attr == 'image_scale' and self.battlemap:
-                    self.update_battlemap_image()
-                break
+    def sync_inputs(self):
+        for attr in GRID_PARAMETERS:
+            text = str(int(getattr(self, f'{attr}_slider').get_current_value()))
+            input_box = getattr(self, f'{attr}_input')
+            if input_box.get_text() != text:
+                input_box.set_text(text)
 
     def update_input_value(self, input_box):
-        for attr in ['image_scale', 'tile_size', 'grid_size_x', 'grid_size_y', 'grid_origin_x', 'grid_origin_y', 'isometric_angle', 'rotation']:
+        for attr in GRID_PARAMETERS:
             if input_box == getattr(self, f'{attr}_input'):
                 try:
                     value = int(input_box.get_text())
                     getattr(self, f'{attr}_slider').set_current_value(value)
-                    if attr == 'image_scale' and self.battlemap:
-                        self.update_battlemap_image()
+                    if attr == 'image_scale':
+                        self.resize_battlemap()
                 except ValueError:
                     input_box.set_text(str(getattr(self, f'{attr}_slider').get_current_value()))
                 break
 
     def update_grid(self):
-        if self.grid:
-            self.grid_surface = pygame.Surface(self.map_window.get_relative_rect().size, pygame.SRCALPHA)
-            if self.resized_battlemap:
-                self.grid_surface.blit(self.resized_battlemap, (0, 0))
-            self.grid.draw(self.grid_surface)
-            self.map_window.set_image(self.grid_surface)
-        
+        self.grid = self.create_grid()
+        self.update_grid_surface()
+
+    def create_grid(self):
         config = self.get_current_config()
         map_rect = self.map_window.get_relative_rect()
-        self.grid = IsometricGrid(config.grid_size_x, config.grid_size_y, config.tile_size, 
-                                  (map_rect.width, map_rect.height), 
-                                  origin=(config.grid_origin_x, config.grid_origin_y),
-                                  isometric_angle=config.isometric_angle,
-                                  rotation=config.rotation)
-        self.update_grid_surface()
+        return IsometricGrid(config.grid_size_x, config.grid_size_y, config.tile_size,
+                             (map_rect.width, map_rect.height),
+                             origin=(config.grid_origin_x, config.grid_origin_y),
+                             isometric_angle=config.isometric_angle,
+                             rotation=config.rotation,
+                             pick_buffer=self.pick_buffer)
 
     def update_battlemap_image(self):
+        if self.battlemap:
+            self.resize_battlemap()
+            self.update_grid_surface()
+            print("Battlemap image updated")  # Debug print
+
+    def resize_battlemap(self, smooth=True):
         if self.battlemap:
             scale = self.image_scale_slider.get_current_value() / 100
             original_size = self.battlemap.get_size()
             new_size = (int(original_size[0] * scale), int(original_size[1] * scale))
-            self.resized_battlemap = pygame.transform.smoothscale(self.battlemap, new_size)
-            self.update_grid_surface()
-            print("Battlemap image updated")  # Debug print
+            if self.battlemap_pyramid is None or self.battlemap_pyramid.source is not self.battlemap:
+                self.battlemap_pyramid = ImagePyramid(self.battlemap)
+            self.resized_battlemap = self.battlemap_pyramid.scaled(new_size, smooth)
 
     
 
@@ -491,7 +660,7 @@ class BattlemapGridApp:
             rotation=self.rotation_slider.get_current_value(),
             image_path=self.image_path,
             image_scale=int(self.image_scale_slider.get_current_value()),
-            tile_tags={f"{k[0]},{k[1]}": v for k, v in self.tile_tags.items()}
+            tile_tags=self.tile_tags
         )
 
 
@@ -527,6 +696,8 @@ class BattlemapGridApp:
         try:
             config = GridConfig.load(file_path)
             self.apply_config(config)
+            self.history.clear()
+            self.grid_parameters = self.get_grid_parameters()
             print(f"Session loaded from {file_path}")
             print(f"Loaded tile tags: {config.tile_tags}")  # Debug print
             print(f"Loaded image path: {config.image_path}")  # Debug print
@@ -534,11 +705,15 @@ class BattlemapGridApp:
             print(f"Error loading session: {str(e)}")
 
     def reset_tile_tags(self):
+        for cell, tag in self.tile_tags.items():
+            self.history.record_tag("tile_tags", cell, tag, None)
+        self.history.commit()
         self.tile_tags.clear()
         self.update_grid_surface()
 
     def remove_image(self):
         self.battlemap = None
+        self.battlemap_pyramid = None
         self.resized_battlemap = None
         self.image_path = None
         self.update_grid_surface()
@@ -589,6 +764,9 @@ class BattlemapGridApp:
             time_delta = self.clock.tick(60) / 1000.0
             self.handle_events()
             self.ui_manager.update(time_delta)
+            if self.grid and self.grid_settle_time is None:
+                # Redraw a stale pick buffer a slice per frame, not on the hovering pick
+                self.pick_buffer.build(self.grid.lattice)
 
             self.window_surface.blit(self.background, (0, 0))
             self.ui_manager.draw_ui(self.window_surface)
@@ -596,11 +774,11 @@ class BattlemapGridApp:
             if self.grid:
                 if self.grid_surface:
                     self.window_surface.blit(self.grid_surface, (600, 0))
+                self.draw_highlight()
                 if self.grid.highlighted_cell:
-                    font = pygame.font.Font(None, 36)
-                    pos_text = font.render(f"Pos: {self.grid.highlighted_cell}", True, (255, 255, 255))
+                    pos_text = text_cache.render(f"Pos: {self.grid.highlighted_cell}")
                     tag = self.tile_tags.get(self.grid.highlighted_cell, "None")
-                    tag_text = font.render(f"Tag: {tag}", True, (255, 255, 255))
+                    tag_text = text_cache.render(f"Tag: {tag}")
                     self.window_surface.blit(pos_text, (self.window_size[0] - pos_text.get_width() - 310, 10))
                     self.window_surface.blit(tag_text, (self.window_size[0] - tag_text.get_width() - 310, 50))
 
@@ -0,0 +1,105 @@
+import pygame
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from neurorefactor.config import config
+
+AssetKey = Tuple[str, Optional[Tuple[int, int]], str]
+
+class AssetManager:
+    """
+    Process-wide image cache keyed by (path, size, convert mode).
+
+    Images are decoded and converted once; scaled variants are derived from the cached
+    converted original. Entries are evicted least-recently-used first once the cached
+    surfaces exceed the byte budget.
+    """
+    CONVERT_MODES = ('alpha', 'opaque', 'none')
+
+    def __init__(self, byte_budget: int):
+        self.byte_budget = byte_budget
+        self.surfaces: "OrderedDict[AssetKey, pygame.Surface]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_image(self, path: str, size: Optional[Tuple[int, int]] = None, convert_mode: str = 'alpha') -> pygame.Surface:
+        """
+        Return the image at `path`, optionally scaled to `size`. The returned surface is shared,
+        so callers must copy it before drawing onto it.
+        """
+        key = (path, tuple(size) if size else None, convert_mode)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        if size:
+            surface = pygame.transform.scale(self.get_image(path, None, convert_mode), key[1])
+        else:
+            surface = self._convert(pygame.image.load(path), convert_mode)
+        self.put(key, surface)
+        return surface
+
+    def set_byte_budget(self, byte_budget: int):
+        """
+        Change the budget in place, evicting right away if the cache is now over it.
+        """
+        self.byte_budget = byte_budget
+        self._evict()
+
+    def is_cached(self, path: str, size: Optional[Tuple[int, int]] = None, convert_mode: str = 'alpha') -> bool:
+        return (path, tuple(size) if size else None, convert_mode) in self.surfaces
+
+    def store_decoded(self, path: str, surface: pygame.Surface, convert_mode: str = 'alpha') -> pygame.Surface:
+        """
+        Insert an image decoded elsewhere (e.g. on a worker thread), converting it on this thread.
+        """
+        surface = self._convert(surface, convert_mode)
+        self.put((path, None, convert_mode), surface)
+        return surface
+
+    def put(self, key: AssetKey, surface: pygame.Surface):
+        if key in self.surfaces:
+            self.bytes_used -= surface_bytes(self.surfaces.pop(key))
+        self.surfaces[key] = surface
+        self.bytes_used += surface_bytes(surface)
+        self._evict()
+
+    def _convert(self, surface: pygame.Surface, convert_mode: str) -> pygame.Surface:
+        if convert_mode not in self.CONVERT_MODES:
+            raise ValueError(f"Unknown convert mode: {convert_mode}")
+        # Conversion needs a display mode; before that, keep the decoded pixel format
+        if convert_mode == 'none' or pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha() if convert_mode == 'alpha' else surface.convert()
+
+    def _evict(self):
+        while self.bytes_used > self.byte_budget and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.bytes_used -= surface_bytes(surface)
+            self.evictions += 1
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Drop every cached variant of `path`, or the whole cache when no path is given.
+        """
+        for key in [key for key in self.surfaces if path is None or key[0] == path]:
+            self.bytes_used -= surface_bytes(self.surfaces.pop(key))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.surfaces),
+            "bytes": self.bytes_used,
+            "byte_budget": self.byte_budget,
+        }
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_pitch() * surface.get_height()
+
+asset_manager = AssetManager(config.assets.cache_byte_budget)
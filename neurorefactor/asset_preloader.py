@@ -0,0 +1,118 @@
+import pygame
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from neurorefactor.asset_manager import AssetManager, asset_manager
+
+ReadyCallback = Callable[[pygame.Surface], None]
+
+class PendingRequest:
+    def __init__(self, size: Tuple[int, int], convert_mode: str, placeholder: pygame.Surface, on_ready: Optional[ReadyCallback]):
+        self.size = size
+        self.convert_mode = convert_mode
+        self.placeholder = placeholder
+        self.on_ready = on_ready
+
+class AssetPreloader:
+    """
+    Decodes images on a worker thread and feeds them into the asset manager.
+
+    `request` hands out a placeholder surface straight away; once the image has been decoded,
+    `update` (called from the main loop) converts it, paints the scaled image into the
+    placeholder in place and calls the request's callback with the final surface.
+    """
+    PLACEHOLDER_COLOR = (40, 40, 40, 255)
+
+    def __init__(self, manager: AssetManager):
+        self.manager = manager
+        self.to_decode: "queue.Queue[str]" = queue.Queue()
+        self.decoded: "queue.Queue[Tuple[str, Optional[pygame.Surface], float, Optional[str]]]" = queue.Queue()
+        self.queued: set = set()
+        self.pending: Dict[str, List[PendingRequest]] = {}
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.worker: Optional[threading.Thread] = None
+
+    def preload(self, paths: Iterable[str]):
+        for path in paths:
+            self._enqueue(path)
+
+    def request(self, path: str, size: Tuple[int, int], on_ready: Optional[ReadyCallback] = None,
+                convert_mode: str = 'alpha', placeholder_color: Tuple[int, int, int, int] = PLACEHOLDER_COLOR) -> pygame.Surface:
+        """
+        The image at `path` scaled to `size` if cached, otherwise a placeholder filled with
+        `placeholder_color` that is painted over once the image is decoded. The placeholder stays
+        as it is if decoding fails.
+        """
+        size = (int(size[0]), int(size[1]))
+        placeholder = pygame.Surface(size, pygame.SRCALPHA)
+        placeholder.fill(placeholder_color)
+        if path in self.errors:
+            return placeholder
+        if self.manager.is_cached(path, None, convert_mode) or self.manager.is_cached(path):
+            surface = self.manager.get_image(path, size, convert_mode)
+            if on_ready:
+                on_ready(surface)
+            return surface
+
+        self.pending.setdefault(path, []).append(PendingRequest(size, convert_mode, placeholder, on_ready))
+        self._enqueue(path)
+        return placeholder
+
+    def update(self) -> int:
+        """
+        Install every image decoded since the last call. Must run on the main thread.
+        """
+        installed = 0
+        while True:
+            try:
+                path, surface, seconds, error = self.decoded.get_nowait()
+            except queue.Empty:
+                break
+            self.queued.discard(path)
+            self.timings[path] = seconds
+            requests = self.pending.pop(path, [])
+            if error:
+                self.errors[path] = error
+                print(f"Failed to preload {path}: {error}")
+                continue
+            for convert_mode in {'alpha'} | {request.convert_mode for request in requests}:
+                self.manager.store_decoded(path, surface, convert_mode)
+            for request in requests:
+                final_surface = self.manager.get_image(path, request.size, request.convert_mode)
+                request.placeholder.fill((0, 0, 0, 0))
+                request.placeholder.blit(final_surface, (0, 0))
+                if request.on_ready:
+                    request.on_ready(final_surface)
+            installed += 1
+        return installed
+
+    def is_idle(self) -> bool:
+        return not self.queued and not self.pending
+
+    def report(self) -> str:
+        lines = [f"{seconds * 1000:8.1f} ms  {path}" for path, seconds in sorted(self.timings.items(), key=lambda item: -item[1])]
+        lines.append(f"{sum(self.timings.values()) * 1000:8.1f} ms  total decode time ({len(self.timings)} images, {len(self.errors)} failed)")
+        return "\n".join(lines)
+
+    def _enqueue(self, path: str):
+        if path in self.queued or self.manager.is_cached(path):
+            return
+        self.queued.add(path)
+        self.to_decode.put(path)
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._decode_loop, name="asset-preloader", daemon=True)
+            self.worker.start()
+
+    def _decode_loop(self):
+        while True:
+            path = self.to_decode.get()
+            start = time.perf_counter()
+            try:
+                surface = pygame.image.load(path)
+                self.decoded.put((path, surface, time.perf_counter() - start, None))
+            except (pygame.error, OSError) as e:
+                self.decoded.put((path, None, time.perf_counter() - start, str(e)))
+
+asset_preloader = AssetPreloader(asset_manager)
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import Dict, Tuple, List, Optional
+import hashlib
+import json
 import os
+import time
 
 class WindowConfig(BaseModel):
     width: int = 2520
@@ -41,6 +44,14 @@ class SpriteConfig(BaseModel):
         }
         return cls(base_path=base_path, paths=paths)
 
+class AssetConfig(BaseModel):
+    cache_byte_budget: int = 64 * 1024 * 1024
+    preload: bool = True
+    battlemap_paths: List[str] = Field(default_factory=lambda: [
+        os.path.join("assets/battlemaps", "iso_dalle.png"),
+        os.path.join("assets/battlemaps", "iso_dalle_outdoor.png")
+    ])
+
 class TileConfig(BaseModel):
     ascii: Dict[str, str] = Field(default_factory=lambda: {'WALL': '#', 'FLOOR': '.'})
 
@@ -59,12 +70,15 @@ class IsometricConfig(BaseModel):
     tile_size: int = 32
     isometric_angle: float = 30.0
     rotation: float = 0.0
+    # Pick clicked tiles and sprites from an off-screen ID buffer instead of inverting the projection
+    pick_buffer: bool = True
 
 class Config(BaseModel):
     window: WindowConfig = WindowConfig()
     ui: UIConfig = UIConfig()
     theme: ThemeConfig = ThemeConfig()
     sprites: SpriteConfig = Field(default_factory=SpriteConfig.default_factory)
+    assets: AssetConfig = AssetConfig()
     tiles: TileConfig = TileConfig()
     entities: EntityConfig = EntityConfig()
     battlemap: BattlemapConfig = BattlemapConfig()
@@ -74,6 +88,76 @@ class Config(BaseModel):
 
 config = Config()
 
+# Parsed configs by absolute path: (mtime, content hash, validated config)
+_config_cache: Dict[str, Tuple[float, str, Config]] = {}
+
+def read_config_file(file_path: str, raw: bytes) -> dict:
+    if file_path.endswith('.toml'):
+        # tomllib is 3.11+; JSON configs work on older interpreters
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError(f"TOML config files need Python 3.11 or newer: {file_path}")
+        return tomllib.loads(raw.decode('utf-8'))
+    elif file_path.endswith('.json'):
+        return json.loads(raw)
+    raise ValueError(f"Unsupported config file type: {file_path}")
+
 def load_config(file_path: str) -> Config:
-    # TODO: Implement loading from a JSON or YAML file
-    return config
\ No newline at end of file
+    """
+    Load and validate a JSON or TOML config file. The parsed config is cached by mtime and
+    content hash, so an unchanged file is not parsed or validated again.
+    """
+    path = os.path.abspath(file_path)
+    mtime = os.path.getmtime(path)
+    cached = _config_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[2]
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    if cached and cached[1] == digest:
+        _config_cache[path] = (mtime, digest, cached[2])
+        return cached[2]
+
+    loaded = Config.model_validate(read_config_file(path, raw))
+    _config_cache[path] = (mtime, digest, loaded)
+    return loaded
+
+def apply_config(new_config: Config, sections: Optional[List[str]] = None) -> List[str]:
+    """
+    Copy the given (or all changed) sections of `new_config` into the global `config` in place,
+    so modules holding a reference to it see the update. Returns the names of changed sections.
+    """
+    changed = []
+    for section in sections or Config.model_fields:
+        new_value = getattr(new_config, section)
+        if getattr(config, section) != new_value:
+            setattr(config, section, new_value)
+            changed.append(section)
+    if 'assets' in changed:
+        # The image cache is sized when it is created; imported here as it imports this module
+        from neurorefactor.asset_manager import asset_manager
+        asset_manager.set_byte_budget(config.assets.cache_byte_budget)
+    return changed
+
+class ConfigWatcher:
+    """
+    Opt-in hot reload: polls the config file and applies only the sections that changed.
+    """
+    def __init__(self, file_path: str, interval: float = 1.0):
+        self.file_path = file_path
+        self.interval = interval
+        self.last_poll = time.monotonic()
+
+    def poll(self) -> List[str]:
+        now = time.monotonic()
+        if now - self.last_poll < self.interval:
+            return []
+        self.last_poll = now
+        try:
+            return apply_config(load_config(self.file_path))
+        except (OSError, ValueError) as e:
+            print(f"Config reload failed: {e}")
+            return []
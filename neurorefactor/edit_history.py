@@ -0,0 +1,164 @@
+import time
+from array import array
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+TagLayers = Dict[str, Dict[Cell, Any]]
+
+class TagDiff:
+    """
+    Changes to one tag layer (e.g. tile_tags) as parallel arrays: cell x, cell y, old value id
+    and new value id. Value ids index the history's value table; 0 means "no tag".
+    """
+    def __init__(self):
+        self.xs = array('i')
+        self.ys = array('i')
+        self.old = array('H')
+        self.new = array('H')
+
+    def append(self, cell: Cell, old_id: int, new_id: int):
+        self.xs.append(cell[0])
+        self.ys.append(cell[1])
+        self.old.append(old_id)
+        self.new.append(new_id)
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def nbytes(self) -> int:
+        return sum(len(buffer) * buffer.itemsize for buffer in (self.xs, self.ys, self.old, self.new))
+
+class Edit:
+    """
+    One undo step: the tag changes of a stroke or fill, or a change of grid parameters.
+    """
+    def __init__(self):
+        self.tag_diffs: Dict[str, TagDiff] = {}
+        self.grid_change: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+        self.timestamp = time.monotonic()
+
+    def is_empty(self) -> bool:
+        return self.grid_change is None and not any(self.tag_diffs.values())
+
+    def nbytes(self) -> int:
+        return sum(diff.nbytes() for diff in self.tag_diffs.values())
+
+    def cells(self, layer: Optional[str] = None) -> List[Cell]:
+        diffs = [self.tag_diffs[layer]] if layer else self.tag_diffs.values()
+        return list({cell for diff in diffs if diff for cell in zip(diff.xs, diff.ys)})
+
+class EditHistory:
+    """
+    Undo/redo journal for the map editors.
+
+    Tag edits are recorded cell by cell into the open edit and closed with `commit`, so a whole
+    stroke or fill is a single step. Undo and redo replay only the recorded changes, never a
+    copy of the map. The oldest steps are dropped once the journal exceeds `memory_limit` bytes.
+    """
+    GRID_MERGE_SECONDS = 1.0
+
+    def __init__(self, memory_limit: int = 16 * 1024 * 1024):
+        self.memory_limit = memory_limit
+        self.undo_stack: List[Edit] = []
+        self.redo_stack: List[Edit] = []
+        self.pending: Optional[Edit] = None
+        self.values: List[Any] = [None]
+        self.value_ids: Dict[Hashable, int] = {None: 0}
+        self.memory_used = 0
+
+    def value_id(self, value: Hashable) -> int:
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            value_id = self.value_ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def record_tag(self, layer: str, cell: Cell, old: Any, new: Any):
+        if old == new:
+            return
+        if self.pending is None:
+            self.pending = Edit()
+        diff = self.pending.tag_diffs.setdefault(layer, TagDiff())
+        diff.append(cell, self.value_id(old), self.value_id(new))
+
+    def record_grid(self, old: Dict[str, Any], new: Dict[str, Any]):
+        """
+        Record a grid-parameter change as its own step. Changes made in quick succession (e.g.
+        while dragging a slider) are merged into one step.
+        """
+        if old == new:
+            return
+        self.commit()
+        last = self.undo_stack[-1] if self.undo_stack else None
+        if (last is not None and last.grid_change is not None and not last.tag_diffs and not self.redo_stack
+                and time.monotonic() - last.timestamp < self.GRID_MERGE_SECONDS):
+            last.grid_change = (last.grid_change[0], dict(new))
+            last.timestamp = time.monotonic()
+            return
+        edit = Edit()
+        edit.grid_change = (dict(old), dict(new))
+        self._push(edit)
+
+    def commit(self):
+        """
+        Close the open edit, making it one undo step.
+        """
+        edit, self.pending = self.pending, None
+        if edit is not None and not edit.is_empty():
+            self._push(edit)
+
+    def undo(self, layers: TagLayers) -> Optional[Edit]:
+        """
+        Revert the last step on `layers` and return it; the caller re-applies
+        `edit.grid_change[0]` if it is a grid change and redraws `edit.cells()`.
+        """
+        self.commit()
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self._replay(edit, layers, undo=True)
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self, layers: TagLayers) -> Optional[Edit]:
+        self.commit()
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self._replay(edit, layers, undo=False)
+        self.undo_stack.append(edit)
+        return edit
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack) or (self.pending is not None and not self.pending.is_empty())
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.pending = None
+        self.memory_used = 0
+
+    def _replay(self, edit: Edit, layers: TagLayers, undo: bool):
+        for layer, diff in edit.tag_diffs.items():
+            tags = layers[layer]
+            values = diff.old if undo else diff.new
+            indices = range(len(diff) - 1, -1, -1) if undo else range(len(diff))
+            for i in indices:
+                cell = (diff.xs[i], diff.ys[i])
+                value = self.values[values[i]]
+                if value is None:
+                    tags.pop(cell, None)
+                else:
+                    tags[cell] = value
+
+    def _push(self, edit: Edit):
+        self.undo_stack.append(edit)
+        self.memory_used += edit.nbytes()
+        for dropped in self.redo_stack:
+            self.memory_used -= dropped.nbytes()
+        self.redo_stack.clear()
+        while self.memory_used > self.memory_limit and len(self.undo_stack) > 1:
+            self.memory_used -= self.undo_stack.pop(0).nbytes()
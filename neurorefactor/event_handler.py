@@ -21,6 +21,8 @@ class GameEventType(Enum):
     ISOMETRIC_TARGET_SET = auto()
     LOAD_BATTLEMAP = auto()
     BATTLEMAP_LOADED = auto()
+    ENTITY_MOVED = auto()
+    CONFIG_RELOADED = auto()
 
 class GameEvent:
     def __init__(self, type: GameEventType, data: Dict[str, Any] = {}):
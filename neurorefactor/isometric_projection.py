@@ -0,0 +1,158 @@
+import math
+import numpy as np
+from typing import List, Optional, Tuple
+
+class IsometricProjection:
+    """
+    Grid <-> screen transform shared by the game window and the map editors.
+
+    The isometric skew, rotation, tile scale and screen offset are folded into a single
+    2x3 affine matrix (and its inverse), recomputed only when a parameter changes:
+
+        screen = M[:, :2] @ (grid_x, grid_y) + M[:, 2]
+
+    Angles are given in degrees.
+    """
+    def __init__(self, tile_size: float, isometric_angle: float = 30, rotation: float = 0, offset: Tuple[float, float] = (0, 0)):
+        self.tile_size = tile_size
+        self.isometric_angle = isometric_angle
+        self.rotation = rotation
+        self.offset = (offset[0], offset[1])
+        self._update_matrices()
+
+    def set_parameters(self, tile_size=None, isometric_angle=None, rotation=None, offset=None) -> bool:
+        """
+        Update any of the parameters; returns True if the transform changed.
+        """
+        parameters = (
+            self.tile_size if tile_size is None else tile_size,
+            self.isometric_angle if isometric_angle is None else isometric_angle,
+            self.rotation if rotation is None else rotation,
+            self.offset if offset is None else (offset[0], offset[1])
+        )
+        if parameters == self.parameters:
+            return False
+        self.tile_size, self.isometric_angle, self.rotation, self.offset = parameters
+        self._update_matrices()
+        return True
+
+    @property
+    def parameters(self) -> Tuple[float, float, float, Tuple[float, float]]:
+        return (self.tile_size, self.isometric_angle, self.rotation, self.offset)
+
+    def _update_matrices(self):
+        cos_a = math.cos(math.radians(self.isometric_angle))
+        sin_a = math.sin(math.radians(self.isometric_angle))
+        cos_r = math.cos(math.radians(self.rotation))
+        sin_r = math.sin(math.radians(self.rotation))
+        t = self.tile_size
+
+        # iso = ((x - y) cos a, (x + y) sin a), then rotate by r and scale by the tile size
+        self.a = t * (cos_a * cos_r - sin_a * sin_r)
+        self.b = t * (-cos_a * cos_r - sin_a * sin_r)
+        self.c = t * (cos_a * sin_r + sin_a * cos_r)
+        self.d = t * (-cos_a * sin_r + sin_a * cos_r)
+        self.tx, self.ty = float(self.offset[0]), float(self.offset[1])
+
+        det = self.a * self.d - self.b * self.c
+        self.inv_a = self.d / det
+        self.inv_b = -self.b / det
+        self.inv_c = -self.c / det
+        self.inv_d = self.a / det
+        self.inv_tx = -(self.inv_a * self.tx + self.inv_b * self.ty)
+        self.inv_ty = -(self.inv_c * self.tx + self.inv_d * self.ty)
+
+        self.matrix = np.array([[self.a, self.b, self.tx], [self.c, self.d, self.ty]])
+        self.inverse = np.array([[self.inv_a, self.inv_b, self.inv_tx], [self.inv_c, self.inv_d, self.inv_ty]])
+
+    def grid_to_screen(self, grid_x: float, grid_y: float) -> Tuple[float, float]:
+        return (self.a * grid_x + self.b * grid_y + self.tx,
+                self.c * grid_x + self.d * grid_y + self.ty)
+
+    def screen_to_grid(self, screen_x: float, screen_y: float) -> Tuple[float, float]:
+        return (self.inv_a * screen_x + self.inv_b * screen_y + self.inv_tx,
+                self.inv_c * screen_x + self.inv_d * screen_y + self.inv_ty)
+
+    def grid_to_screen_batch(self, points: np.ndarray) -> np.ndarray:
+        """
+        Transform an (N, 2) array of grid points to an (N, 2) float array of screen points.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        return points @ self.matrix[:, :2].T + self.matrix[:, 2]
+
+    def screen_to_grid_batch(self, points: np.ndarray) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float64)
+        return points @ self.inverse[:, :2].T + self.inverse[:, 2]
+
+class TileLattice:
+    """
+    Screen coordinates of every grid vertex, a (width + 1) x (height + 1) lattice, so a tile's
+    polygon is four lookups instead of four transforms. The lattice is rebuilt lazily, only
+    when the projection parameters or the grid size change.
+    """
+    def __init__(self, projection: IsometricProjection, width: int, height: int):
+        self.projection = projection
+        self.width = width
+        self.height = height
+        self.vertices: Optional[np.ndarray] = None
+        self._points: List[List[List[int]]] = []
+        self._key = None
+
+    def _ensure(self):
+        key = (self.projection.parameters, self.width, self.height)
+        if key == self._key:
+            return
+        grid_x, grid_y = np.meshgrid(np.arange(self.width + 1), np.arange(self.height + 1), indexing='ij')
+        points = np.stack([grid_x, grid_y], axis=-1).reshape(-1, 2)
+        # astype truncates toward zero, matching int() in the scalar grid_to_screen
+        screen = self.projection.grid_to_screen_batch(points).astype(np.int64)
+        self.vertices = screen.reshape(self.width + 1, self.height + 1, 2)
+        self._points = self.vertices.tolist()
+        self._key = key
+
+    def set_vertices(self, vertices: np.ndarray):
+        """
+        Install precomputed vertices (e.g. from a baked map) for the current parameters.
+        """
+        if vertices.shape != (self.width + 1, self.height + 1, 2):
+            raise ValueError(f"Expected a {self.width + 1}x{self.height + 1} lattice, got {vertices.shape[:2]}")
+        self.vertices = vertices
+        self._points = vertices.tolist()
+        self._key = (self.projection.parameters, self.width, self.height)
+
+    def get_vertices(self) -> np.ndarray:
+        self._ensure()
+        return self.vertices
+
+    def vertex(self, grid_x: int, grid_y: int) -> Tuple[int, int]:
+        self._ensure()
+        if 0 <= grid_x <= self.width and 0 <= grid_y <= self.height:
+            return tuple(self._points[grid_x][grid_y])
+        screen_x, screen_y = self.projection.grid_to_screen(grid_x, grid_y)
+        return int(screen_x), int(screen_y)
+
+    def lines(self, stride: int = 1) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Start and end points of every `stride`-th grid line in each direction plus the outer
+        border, projected directly so a coarse preview never builds the full lattice.
+        """
+        def point(grid_x, grid_y):
+            screen_x, screen_y = self.projection.grid_to_screen(grid_x, grid_y)
+            return int(screen_x), int(screen_y)
+
+        xs = list(range(0, self.width, stride)) + [self.width]
+        ys = list(range(0, self.height, stride)) + [self.height]
+        return ([(point(x, 0), point(x, self.height)) for x in xs] +
+                [(point(0, y), point(self.width, y)) for y in ys])
+
+    def polygon(self, grid_x: int, grid_y: int) -> List[Tuple[int, int]]:
+        """
+        Corners of the tile at (grid_x, grid_y) in the usual order: (x, y), (x+1, y), (x+1, y+1), (x, y+1).
+        The corner points are shared with the lattice and must not be modified.
+        """
+        self._ensure()
+        if 0 <= grid_x < self.width and 0 <= grid_y < self.height:
+            column, next_column = self._points[grid_x], self._points[grid_x + 1]
+            return [column[grid_y], next_column[grid_y], next_column[grid_y + 1], column[grid_y + 1]]
+        return [self.vertex(grid_x, grid_y), self.vertex(grid_x + 1, grid_y),
+                self.vertex(grid_x + 1, grid_y + 1), self.vertex(grid_x, grid_y + 1)]
@@ -1,14 +1,74 @@
+# Imported first so the profiler can time every import below
+import sys
+from neurorefactor.startup_profiler import startup_profiler
+# argparse runs too late to see the heavy imports, so the flag is checked by hand here
+if "--profile-startup" in sys.argv[1:]:
+    startup_profiler.enable()
+import argparse
 import pygame
 import pygame_gui
-from neurorefactor.config import config
-from neurorefactor.event_handler import event_handler
-from neurorefactor.ui.isometric_battlemap_window import create_isometric_battlemap_window
-from neurorefactor.ui.details_window import create_details_window
-from neurorefactor.ui.actions_window import create_actions_window
-from neurorefactor.ui.logger_window import create_logger_window
+from typing import Dict
+from neurorefactor.config import config, load_config, apply_config, ConfigWatcher
+from neurorefactor.event_handler import event_handler, GameEventType, GameEvent
+from neurorefactor.asset_manager import asset_manager
+from neurorefactor.asset_preloader import asset_preloader
+from neurorefactor.ui.portrait_cache import portrait_cache
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NeuroDragon isometric client")
+    parser.add_argument("--config", help="JSON or TOML config file overriding the defaults")
+    parser.add_argument("--hot-reload", action="store_true", help="Poll the config file and apply changes live")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and initialization times up to the first frame")
+    return parser.parse_args()
+
+def apply_reloaded_config(event: GameEvent, manager: pygame_gui.UIManager, windows: Dict[str, pygame_gui.elements.UIWindow]):
+    sections = event.data['sections']
+    if 'window' in sections:
+        pygame.display.set_caption(config.window.title)
+    if 'theme' in sections:
+        manager.get_theme().load_theme(config.theme.path)
+        manager.rebuild_all_from_changed_theme_data()
+    if 'sprites' in sections:
+        asset_manager.invalidate()
+        portrait_cache.clear()
+    if 'ui' in sections:
+        for name, window in windows.items():
+            rect = getattr(config.ui, name)
+            new_rect = pygame.Rect(rect['left'], rect['top'], rect['width'], rect['height'])
+            if window.get_relative_rect() != new_rect:
+                window.set_relative_position(new_rect.topleft)
+                window.set_dimensions(new_rect.size)
+
+def create_window(name: str, manager: pygame_gui.UIManager) -> pygame_gui.elements.UIWindow:
+    """
+    Import a window module and run its factory on demand, so windows that are not needed
+    for the first frame do not pay their import cost up front.
+    """
+    with startup_profiler.measure(f"import {name}"):
+        if name == 'battlemap_window':
+            from neurorefactor.ui.isometric_battlemap_window import create_isometric_battlemap_window as factory
+        elif name == 'details_window':
+            from neurorefactor.ui.details_window import create_details_window as factory
+        elif name == 'actions_window':
+            from neurorefactor.ui.actions_window import create_actions_window as factory
+        elif name == 'logger_window':
+            from neurorefactor.ui.logger_window import create_logger_window as factory
+        else:
+            raise ValueError(f"Unknown window: {name}")
+    with startup_profiler.measure(f"create {name}"):
+        return factory(manager)
 
 def main():
-    pygame.init()
+    args = parse_args()
+    if args.profile_startup:
+        # Already enabled at import when run as a script; this covers main() called directly
+        startup_profiler.enable()
+    if args.config:
+        apply_config(load_config(args.config))
+    config_watcher = ConfigWatcher(args.config) if args.config and args.hot_reload else None
+
+    with startup_profiler.measure("pygame.init"):
+        pygame.init()
 
     pygame.display.set_caption(config.window.title)
     window_surface = pygame.display.set_mode((config.window.width, config.window.height))
@@ -16,16 +76,27 @@ def main():
     background = pygame.Surface((config.window.width, config.window.height))
     background.fill(pygame.Color("#000000"))
 
-    manager = pygame_gui.UIManager((config.window.width, config.window.height), config.theme.path)
+    if config.assets.preload:
+        asset_preloader.preload(config.sprites.paths.values())
+        asset_preloader.preload(config.assets.battlemap_paths)
 
-    # Create windows
-    isometric_battlemap_window = create_isometric_battlemap_window(manager)
-    details_window = create_details_window(manager)
-    actions_window = create_actions_window(manager)
-    logger_window = create_logger_window(manager)
+    with startup_profiler.measure("UIManager and theme"):
+        manager = pygame_gui.UIManager((config.window.width, config.window.height), config.theme.path)
+
+    # Create the side windows now; the battlemap window is built right after the first frame
+    windows: Dict[str, pygame_gui.elements.UIWindow] = {}
+    for name in ('details_window', 'actions_window', 'logger_window'):
+        windows[name] = create_window(name, manager)
+    deferred_windows = ['battlemap_window']
+    isometric_battlemap_window = None
+    event_handler.register_game_handler(
+        GameEventType.CONFIG_RELOADED,
+        lambda event: apply_reloaded_config(event, manager, windows)
+    )
 
     clock = pygame.time.Clock()
     is_running = True
+    preload_reported = False
 
     while is_running:
         time_delta = clock.tick(60) / 1000.0
@@ -34,9 +105,21 @@ def main():
                 is_running = False
 
             manager.process_events(event)
-            isometric_battlemap_window.process_event(event)
+            if isometric_battlemap_window:
+                isometric_battlemap_window.process_event(event)
             event_handler.handle_pygame_event(event)
 
+        if config_watcher:
+            changed_sections = config_watcher.poll()
+            if changed_sections:
+                print(f"Config reloaded, changed sections: {changed_sections}")
+                event_handler.dispatch_game_event(GameEventType.CONFIG_RELOADED, {"sections": changed_sections})
+
+        asset_preloader.update()
+        if config.debug and not preload_reported and asset_preloader.is_idle():
+            print(f"Asset preload timings:\n{asset_preloader.report()}")
+            preload_reported = True
+
         manager.update(time_delta)
 
         window_surface.blit(background, (0, 0))
@@ -44,6 +127,15 @@ def main():
 
         pygame.display.update()
 
+        if deferred_windows:
+            startup_profiler.mark_first_frame()
+            for name in deferred_windows:
+                windows[name] = create_window(name, manager)
+            deferred_windows.clear()
+            isometric_battlemap_window = windows['battlemap_window']
+            if startup_profiler.enabled:
+                print(startup_profiler.report())
+
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+"""
+Offline baking of battlemaps into render-ready runtime bundles (.ndbundle).
+
+Opening a GridConfig in the game means parsing it, building the terrain cell by cell, loading
+and scaling the background and drawing every label polygon. A bundle holds the result of all
+of that for one map area size and projection, so loading it is a file read plus a few surface
+wraps:
+
+    python -m neurorefactor.map_bake assets/outdoor_bm_complete.json     # writes assets/outdoor_bm_complete.ndbundle
+
+Layout, little-endian:
+
+    magic  b"NDBAKE\\0"   version u16   header length u32   header (UTF-8 JSON)
+    array payloads, each 16-byte aligned, at the offsets listed in header["arrays"]
+
+Arrays: background and labels (height x width x RGBA uint8, the background is optional),
+vertices (the projected (width + 1) x (height + 1) x 2 vertex lattice), terrain (width x height
+indices into header["terrain_palette"]) and floor_cells (N x 2, the cells entities can be placed on).
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import numpy as np
+import pygame
+from typing import Any, Dict, List, Optional, Tuple
+from neurorefactor.config import config
+from neurorefactor.map_format import load_config_data, resolve_image_path
+from neurorefactor.tile_layer import TileLayer
+from neurorefactor.ui.isometric_grid import IsometricGrid, tile_color
+
+MAGIC = b"NDBAKE\0"
+VERSION = 1
+BUNDLE_SUFFIX = ".ndbundle"
+ALIGNMENT = 16
+DEFAULT_TILE = "FLOOR"
+
+class BakedMap:
+    """
+    A loaded bundle. The surfaces and arrays share the bundle's buffer and must not be drawn on.
+    """
+    def __init__(self, header: Dict[str, Any], arrays: Dict[str, np.ndarray], surfaces: Dict[str, pygame.Surface]):
+        self.header = header
+        self.parameters: Dict[str, Any] = header['parameters']
+        self.size: Tuple[int, int] = tuple(header['size'])
+        self.projection: Dict[str, Any] = header['projection']
+        self.terrain_palette: List[str] = header['terrain_palette']
+        self.vertices = arrays['vertices']
+        self.terrain = arrays['terrain']
+        self.floor_cells = arrays['floor_cells']
+        self.background: Optional[pygame.Surface] = surfaces.get('background')
+        self.labels: pygame.Surface = surfaces['labels']
+
+    @property
+    def width(self) -> int:
+        return self.terrain.shape[0]
+
+    @property
+    def height(self) -> int:
+        return self.terrain.shape[1]
+
+    def tile_rows(self) -> List[List[str]]:
+        """
+        Tile types as rows[x][y].
+        """
+        return np.array(self.terrain_palette, dtype=object)[self.terrain].tolist()
+
+    def matches(self, size: Tuple[int, int], projection: Dict[str, Any]) -> bool:
+        return self.size == tuple(size) and self.projection == game_projection(**projection)
+
+def default_map_size() -> Tuple[int, int]:
+    """
+    Size of the map area of the game's battlemap window (the window minus its button column).
+    """
+    window = config.ui.battlemap_window
+    return (int(window['width'] - (1.5 * config.sprites.size[0] + 6)), window['height'])
+
+def game_projection(tile_size=None, isometric_angle=None, rotation=None, origin=(0, 0)) -> Dict[str, Any]:
+    return {
+        'tile_size': config.isometric.tile_size if tile_size is None else tile_size,
+        'isometric_angle': float(config.isometric.isometric_angle if isometric_angle is None else isometric_angle),
+        'rotation': float(config.isometric.rotation if rotation is None else rotation),
+        'origin': [int(origin[0]), int(origin[1])],
+    }
+
+def bundle_path_for(map_path: str) -> str:
+    return os.path.splitext(map_path)[0] + BUNDLE_SUFFIX
+
+def find_bundle(map_path: str, size: Tuple[int, int], projection: Dict[str, Any]) -> Optional[BakedMap]:
+    """
+    The bundle baked from `map_path` for this map area and projection, if there is one and it
+    is newer than the map.
+    """
+    bundle_path = map_path if map_path.endswith(BUNDLE_SUFFIX) else bundle_path_for(map_path)
+    if not os.path.exists(bundle_path):
+        return None
+    if bundle_path != map_path and os.path.getmtime(bundle_path) < os.path.getmtime(map_path):
+        print(f"Bundle {bundle_path} is older than {map_path}, ignoring it")
+        return None
+    try:
+        baked = load_bundle(bundle_path)
+    except (OSError, ValueError) as e:
+        print(f"Could not load bundle {bundle_path}: {e}")
+        return None
+    if not baked.matches(size, projection):
+        print(f"Bundle {bundle_path} was baked for another map size or projection, ignoring it")
+        return None
+    return baked
+
+def bake_map(map_path: str, bundle_path: Optional[str] = None, size: Optional[Tuple[int, int]] = None,
+             projection: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Bake the map at `map_path` (JSON or .ndmap) for a map area of `size` drawn with `projection`
+    (the game's settings by default) and write the bundle next to it or to `bundle_path`.
+    """
+    size = tuple(size or default_map_size())
+    projection = game_projection(**(projection or {}))
+    data = load_config_data(map_path)
+    width, height = data['grid_size_x'], data['grid_size_y']
+
+    tile_tags = TileLayer.coerce(data.pop('tile_tags', {}))
+    data.pop('entity_tags', None)
+    data.pop('image_offset', None)
+    names = [DEFAULT_TILE if tag is None else str(tag).upper() for tag in tile_tags.palette]
+    terrain_palette = sorted(set(names))
+    remap = np.array([terrain_palette.index(name) for name in names], dtype=np.uint8)
+    terrain = remap[tile_tags.index_array(width, height)]
+    floor_cells = np.argwhere(terrain == terrain_palette.index(DEFAULT_TILE)).astype(np.int32) \
+        if DEFAULT_TILE in terrain_palette else np.zeros((0, 2), dtype=np.int32)
+
+    grid = IsometricGrid(width, height, projection['tile_size'], size, origin=tuple(projection['origin']),
+                         isometric_angle=projection['isometric_angle'], rotation=projection['rotation'])
+    vertices = grid.lattice.get_vertices()
+
+    labels = pygame.Surface(size, pygame.SRCALPHA)
+    colors = [tile_color(name) for name in terrain_palette]
+    for (x, y), index in np.ndenumerate(terrain):
+        pygame.draw.polygon(labels, colors[index], grid.lattice.polygon(x, y))
+
+    arrays = {
+        'labels': surface_array(labels),
+        'vertices': vertices,
+        'terrain': terrain,
+        'floor_cells': floor_cells,
+    }
+    image_path = resolve_image_path(data.get('image_path'))
+    if image_path:
+        arrays['background'] = surface_array(pygame.transform.scale(pygame.image.load(image_path), size))
+    elif data.get('image_path'):
+        print(f"Background {data['image_path']} not found, baking without it")
+
+    header = {
+        'source': map_path,
+        'parameters': data,
+        'size': list(size),
+        'projection': projection,
+        'terrain_palette': terrain_palette,
+    }
+    bundle_path = bundle_path or bundle_path_for(map_path)
+    write_bundle(bundle_path, header, arrays)
+    return bundle_path
+
+def surface_array(surface: pygame.Surface) -> np.ndarray:
+    width, height = surface.get_size()
+    return np.frombuffer(pygame.image.tobytes(surface, 'RGBA'), dtype=np.uint8).reshape(height, width, 4)
+
+def write_bundle(bundle_path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    specs = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        specs.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset += array.nbytes
+    header = json.dumps({**header, 'arrays': specs}).encode('utf-8')
+    start = -(-(len(MAGIC) + 6 + len(header)) // ALIGNMENT) * ALIGNMENT
+    with open(bundle_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<HI', VERSION, len(header)) + header)
+        for spec, array in zip(specs, arrays.values()):
+            f.seek(start + spec['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+
+def load_bundle(bundle_path: str) -> BakedMap:
+    with open(bundle_path, 'rb') as f:
+        buffer = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(buffer)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{bundle_path} is not a map bundle")
+    version, header_length = struct.unpack_from('<HI', buffer, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"{bundle_path} uses bundle version {version}, expected {VERSION}")
+    header_start = len(MAGIC) + 6
+    header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+    start = -(-(header_start + header_length) // ALIGNMENT) * ALIGNMENT
+
+    arrays = {}
+    for spec in header['arrays']:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        arrays[spec['name']] = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + spec['offset']).reshape(spec['shape'])
+
+    surfaces = {}
+    for name in ('background', 'labels'):
+        if name in arrays:
+            height, width, _ = arrays[name].shape
+            surfaces[name] = pygame.image.frombuffer(arrays[name], (width, height), 'RGBA')
+    return BakedMap(header, arrays, surfaces)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bake battlemaps into render-ready runtime bundles")
+    parser.add_argument("maps", nargs="+", help="GridConfig sessions (.json or .ndmap) to bake")
+    parser.add_argument("-o", "--output-dir", help="Directory for the bundles (default: next to each map)")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="Map area size (default: the game window's)")
+    parser.add_argument("--tile-size", type=int, help="Tile size (default: config.isometric.tile_size)")
+    parser.add_argument("--isometric-angle", type=float, help="Isometric angle (default: config.isometric.isometric_angle)")
+    parser.add_argument("--rotation", type=float, help="Rotation (default: config.isometric.rotation)")
+    args = parser.parse_args(argv)
+
+    projection = {'tile_size': args.tile_size, 'isometric_angle': args.isometric_angle, 'rotation': args.rotation}
+    failed = 0
+    for map_path in args.maps:
+        bundle_path = None
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            bundle_path = os.path.join(args.output_dir, os.path.basename(bundle_path_for(map_path)))
+        start = time.perf_counter()
+        try:
+            bundle_path = bake_map(map_path, bundle_path, args.size, projection)
+        except (OSError, ValueError, KeyError, pygame.error) as e:
+            print(f"Failed to bake {map_path}: {e}")
+            failed += 1
+            continue
+        print(f"Baked {map_path} -> {bundle_path} ({os.path.getsize(bundle_path) / 1024:.0f} KB, {time.perf_counter() - start:.2f} s)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
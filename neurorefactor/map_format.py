@@ -0,0 +1,171 @@
+"""
+Binary battlemap format (.ndmap), little-endian:
+
+    magic  b"NDMAP\\0"   version u16   header length u32   header (UTF-8 JSON grid parameters)
+    layer count u16, then per layer:
+        name        u16 length + UTF-8
+        palette     u16 count, then u16 length + UTF-8 per tag (index 0, "no tag", is implicit)
+        encoding    u8: 0 = dense, 1 = sparse
+        width u32, height u32, payload length u32, payload
+            dense:  zlib-compressed uint8 palette indices, width x height, row-major by x
+            sparse: count u32, then x int32[count], y int32[count], index uint8[count]
+
+Sparse layers (e.g. entity placements) are used when they are smaller than the compressed array.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from pydantic import BaseModel
+from neurorefactor.tile_layer import TileLayer
+
+MAGIC = b"NDMAP\0"
+VERSION = 1
+BINARY_SUFFIX = ".ndmap"
+DENSE, SPARSE = 0, 1
+
+def is_binary_map(file_path: str) -> bool:
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def save_map(file_path: str, parameters: Dict[str, Any], layers: Dict[str, TileLayer]):
+    header = json.dumps(parameters).encode('utf-8')
+    chunks = [MAGIC, struct.pack('<HI', VERSION, len(header)), header, struct.pack('<H', len(layers))]
+    for name, layer in layers.items():
+        chunks.append(_pack_string(name))
+        chunks.append(struct.pack('<H', len(layer.palette) - 1))
+        chunks.extend(_pack_string(str(tag)) for tag in layer.palette[1:])
+        chunks.append(_pack_layer(layer))
+    with open(file_path, 'wb') as f:
+        f.write(b"".join(chunks))
+
+def load_map(file_path: str) -> Tuple[Dict[str, Any], Dict[str, TileLayer]]:
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        buffer = memoryview(mapped)
+        try:
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{file_path} is not a binary battlemap")
+            offset = len(MAGIC)
+            version, header_length = struct.unpack_from('<HI', buffer, offset)
+            if version > VERSION:
+                raise ValueError(f"{file_path} uses map format version {version}, newer than {VERSION}")
+            offset += 6
+            parameters = json.loads(bytes(buffer[offset:offset + header_length]))
+            offset += header_length
+
+            layers = {}
+            (layer_count,) = struct.unpack_from('<H', buffer, offset)
+            offset += 2
+            for _ in range(layer_count):
+                name, offset = _unpack_string(buffer, offset)
+                (palette_size,) = struct.unpack_from('<H', buffer, offset)
+                offset += 2
+                palette = []
+                for _ in range(palette_size):
+                    tag, offset = _unpack_string(buffer, offset)
+                    palette.append(tag)
+                layers[name], offset = _unpack_layer(buffer, offset, palette)
+        finally:
+            buffer.release()
+    return parameters, layers
+
+def save_config(config: BaseModel, file_path: str):
+    """
+    Write a GridConfig in the binary format: its TileLayer fields become layers, every other
+    field goes into the header.
+    """
+    layers = {name: value for name, value in config if isinstance(value, TileLayer)}
+    parameters = {name: value for name, value in config if name not in layers}
+    save_map(file_path, parameters, layers)
+
+def load_config_data(file_path: str) -> Dict[str, Any]:
+    """
+    Field values of a saved GridConfig, binary or JSON, ready for `GridConfig(**data)`.
+    """
+    if is_binary_map(file_path):
+        parameters, layers = load_map(file_path)
+        return {**parameters, **layers}
+    with open(file_path, 'r') as f:
+        return json.load(f)
+
+def normalize_image_path(image_path: Optional[str], asset_root: str) -> Optional[str]:
+    """
+    Rewrite an absolute path (e.g. C:\\Users\\...\\assets\\battlemaps\\map.png) to a path relative
+    to the project, starting at the asset directory, with forward slashes.
+    """
+    if not image_path:
+        return image_path
+    parts = [part for part in re.split(r"[\\/]+", image_path) if part]
+    root_name = os.path.basename(os.path.normpath(asset_root))
+    lowered = [part.lower() for part in parts]
+    if root_name.lower() in lowered:
+        start = len(lowered) - 1 - lowered[::-1].index(root_name.lower())
+        return "/".join([root_name] + parts[start + 1:])
+    return image_path.replace("\\", "/")
+
+def resolve_image_path(image_path: Optional[str]) -> Optional[str]:
+    """
+    The map's background path if it exists, else the same path rebased on the project's assets
+    directory (saved maps often carry absolute paths from another machine), else None.
+    """
+    if not image_path or os.path.exists(image_path):
+        return image_path
+    relative = normalize_image_path(image_path, "assets")
+    return relative if os.path.exists(relative) else None
+
+def convert_json_map(json_path: str, binary_path: str = None) -> str:
+    """
+    Convert a JSON session to the binary format next to it (or at `binary_path`).
+    """
+    data = load_config_data(json_path)
+    layers = {name: TileLayer.from_dict(data.pop(name)) for name in ('tile_tags', 'entity_tags') if name in data}
+    data.pop('image_offset', None)  # computed from the offset fields
+    binary_path = binary_path or os.path.splitext(json_path)[0] + BINARY_SUFFIX
+    save_map(binary_path, data, layers)
+    return binary_path
+
+def _pack_string(text: str) -> bytes:
+    encoded = text.encode('utf-8')
+    return struct.pack('<H', len(encoded)) + encoded
+
+def _unpack_string(buffer: memoryview, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from('<H', buffer, offset)
+    offset += 2
+    return str(buffer[offset:offset + length], 'utf-8'), offset + length
+
+def _pack_layer(layer: TileLayer) -> bytes:
+    xs, ys = np.nonzero(layer.data)
+    # Trim the unused capacity of the array, keeping every tagged cell
+    width = int(xs.max()) + 1 if len(xs) else 0
+    height = int(ys.max()) + 1 if len(ys) else 0
+    dense = zlib.compress(np.ascontiguousarray(layer.data[:width, :height]).tobytes(), 1)
+    sparse = b"".join((struct.pack('<I', len(xs)), xs.astype('<i4').tobytes(), ys.astype('<i4').tobytes(),
+                       layer.data[xs, ys].astype(np.uint8).tobytes()))
+    encoding, payload = (SPARSE, sparse) if len(sparse) < len(dense) else (DENSE, dense)
+    return struct.pack('<BIII', encoding, width, height, len(payload)) + payload
+
+def _unpack_layer(buffer: memoryview, offset: int, palette) -> Tuple[TileLayer, int]:
+    encoding, width, height, length = struct.unpack_from('<BIII', buffer, offset)
+    offset += 13
+    payload = buffer[offset:offset + length]
+    layer = TileLayer(width, height, palette)
+    if encoding == DENSE:
+        layer.data = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(width, height).copy()
+    elif encoding == SPARSE:
+        (count,) = struct.unpack_from('<I', payload, 0)
+        xs = np.frombuffer(payload, dtype='<i4', count=count, offset=4)
+        ys = np.frombuffer(payload, dtype='<i4', count=count, offset=4 + 4 * count)
+        indices = np.frombuffer(payload, dtype=np.uint8, count=count, offset=4 + 8 * count)
+        layer.data[xs, ys] = indices
+        del xs, ys, indices
+    else:
+        raise ValueError(f"Unknown layer encoding {encoding}")
+    payload.release()
+    return layer, offset + length
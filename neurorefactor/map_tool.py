@@ -0,0 +1,198 @@
+"""
+Batch conversion and validation of battlemap sessions.
+
+    python -m neurorefactor.map_tool assets/                 # validate every map, print a report
+    python -m neurorefactor.map_tool assets/ --normalize     # also rewrite the JSON sessions in place
+    python -m neurorefactor.map_tool assets/ --convert -o build/maps   # write .ndmap copies
+
+Maps are processed in parallel, one per worker process.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from neurorefactor.map_format import BINARY_SUFFIX, load_config_data, normalize_image_path, save_map
+from neurorefactor.tile_layer import TileLayer, parse_cell
+
+REQUIRED_FIELDS = ['tile_size', 'grid_size_x', 'grid_size_y', 'grid_origin_x', 'grid_origin_y', 'isometric_angle', 'rotation']
+KNOWN_TAGS = {
+    'tile_tags': {"floor", "water", "wall", "void"},
+    'entity_tags': {"skeleton", "goblin"},
+}
+
+class MapReport(BaseModel):
+    path: str
+    tile_tags: int = 0
+    entity_tags: int = 0
+    out_of_bounds: Dict[str, int] = {}
+    unknown_tags: Dict[str, List[str]] = {}
+    invalid_keys: int = 0
+    image_path: Optional[str] = None
+    normalized_image_path: Optional[str] = None
+    missing_image: bool = False
+    written: List[str] = []
+    errors: List[str] = []
+    seconds: float = 0.0
+
+    @property
+    def has_warnings(self) -> bool:
+        return bool(any(self.out_of_bounds.values()) or self.unknown_tags or self.invalid_keys or self.missing_image)
+
+def read_layer(raw: Any, report: MapReport) -> TileLayer:
+    if isinstance(raw, TileLayer):
+        return raw
+    valid = {}
+    for key, tag in (raw or {}).items():
+        cell = parse_cell(key)
+        if cell is None:
+            report.invalid_keys += 1
+        else:
+            valid[cell] = tag
+    return TileLayer.from_dict(valid)
+
+def process_map(path: str, options: Dict[str, Any]) -> MapReport:
+    """
+    Validate (and optionally normalize and convert) one map. Runs in a worker process.
+    """
+    start = time.perf_counter()
+    report = MapReport(path=path)
+    try:
+        data = load_config_data(path)
+    except (OSError, ValueError) as e:
+        report.errors.append(f"Could not read map: {e}")
+        return report
+
+    missing = [field for field in REQUIRED_FIELDS if field not in data]
+    if missing:
+        report.errors.append(f"Missing fields: {', '.join(missing)}")
+        return report
+
+    width, height = int(data['grid_size_x']), int(data['grid_size_y'])
+    layers = {}
+    for name in ('tile_tags', 'entity_tags'):
+        if name not in data:
+            continue
+        layer = layers[name] = read_layer(data.pop(name), report)
+        setattr(report, name, len(layer))
+        outside = layer.data.copy()
+        outside[:width, :height] = 0
+        report.out_of_bounds[name] = int(np.count_nonzero(outside))
+        unknown = sorted(set(layer.counts()) - KNOWN_TAGS[name])
+        if unknown:
+            report.unknown_tags[name] = unknown
+        if options['drop_orphans']:
+            layer.data[outside != 0] = 0
+
+    report.image_path = data.get('image_path')
+    report.normalized_image_path = normalize_image_path(report.image_path, options['asset_root'])
+    if report.normalized_image_path:
+        project_root = os.path.dirname(os.path.abspath(options['asset_root']))
+        report.missing_image = not os.path.exists(os.path.join(project_root, report.normalized_image_path))
+
+    if options['normalize'] or options['convert']:
+        data['image_path'] = report.normalized_image_path
+        base = os.path.splitext(os.path.basename(path))[0]
+        output_dir = options['output_dir'] or os.path.dirname(path)
+        try:
+            if options['normalize']:
+                json_path = os.path.join(output_dir, base + ".json")
+                with open(json_path, 'w') as f:
+                    json.dump({**data, **{name: layer.to_json_dict() for name, layer in layers.items()}}, f, indent=2)
+                report.written.append(json_path)
+            if options['convert']:
+                data.pop('image_offset', None)  # computed from the offset fields
+                binary_path = os.path.join(output_dir, base + BINARY_SUFFIX)
+                save_map(binary_path, data, layers)
+                report.written.append(binary_path)
+        except OSError as e:
+            report.errors.append(f"Could not write output: {e}")
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+def collect_paths(inputs: List[str]) -> List[str]:
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            paths.extend(sorted(glob.glob(os.path.join(entry, "*.json")) + glob.glob(os.path.join(entry, "*" + BINARY_SUFFIX))))
+        else:
+            paths.extend(sorted(glob.glob(entry)) or [entry])
+    return paths
+
+def run(paths: List[str], options: Dict[str, Any], workers: Optional[int] = None) -> List[MapReport]:
+    if workers == 1 or len(paths) <= 1:
+        return [process_map(path, options) for path in paths]
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_map, path, options): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                reports.append(MapReport(path=futures[future], errors=[f"Worker failed: {e}"]))
+    return sorted(reports, key=lambda report: report.path)
+
+def format_report(reports: List[MapReport], seconds: float) -> str:
+    lines = []
+    for report in reports:
+        status = "ERROR" if report.errors else "WARN " if report.has_warnings else "ok   "
+        lines.append(f"{status} {report.path}  ({report.tile_tags} tiles, {report.entity_tags} entities, {report.seconds * 1000:.1f} ms)")
+        for error in report.errors:
+            lines.append(f"      {error}")
+        for name, count in report.out_of_bounds.items():
+            if count:
+                lines.append(f"      {count} {name} outside the grid (orphans)")
+        for name, tags in report.unknown_tags.items():
+            lines.append(f"      unknown {name}: {', '.join(tags)}")
+        if report.invalid_keys:
+            lines.append(f"      {report.invalid_keys} invalid cell keys skipped")
+        if report.image_path != report.normalized_image_path:
+            lines.append(f"      image_path -> {report.normalized_image_path}")
+        if report.missing_image:
+            lines.append(f"      image not found: {report.normalized_image_path}")
+        for written in report.written:
+            lines.append(f"      wrote {written}")
+    failed = sum(1 for report in reports if report.errors)
+    warned = sum(1 for report in reports if not report.errors and report.has_warnings)
+    lines.append(f"{len(reports)} maps, {failed} failed, {warned} with warnings, {seconds:.2f} s")
+    return "\n".join(lines)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate, normalize and convert battlemap sessions in bulk")
+    parser.add_argument("inputs", nargs="+", help="Map files, globs or directories of .json/.ndmap sessions")
+    parser.add_argument("--normalize", action="store_true", help="Write normalized JSON sessions (in place unless --output-dir is given)")
+    parser.add_argument("--convert", action="store_true", help="Write binary .ndmap copies")
+    parser.add_argument("--drop-orphans", action="store_true", help="Remove tags outside the grid from the written maps")
+    parser.add_argument("-o", "--output-dir", help="Directory for written maps")
+    parser.add_argument("--asset-root", default="assets", help="Asset directory image paths are made relative to")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("--report", help="Also write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    options = {
+        'normalize': args.normalize,
+        'convert': args.convert,
+        'drop_orphans': args.drop_orphans,
+        'output_dir': args.output_dir,
+        'asset_root': args.asset_root,
+    }
+    start = time.perf_counter()
+    reports = run(collect_paths(args.inputs), options, args.workers)
+    print(format_report(reports, time.perf_counter() - start))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump([report.model_dump() for report in reports], f, indent=2)
+    return 1 if any(report.errors for report in reports) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
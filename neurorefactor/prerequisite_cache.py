@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Tuple
+from dnd.actions import Attack, Action
+from dnd.battlemap import Entity, BattleMap
+from neurorefactor.event_handler import handle_game_event, GameEventType, GameEvent
+
+CacheKey = Tuple[str, str, str, int]
+
+class PrerequisiteCache:
+    """
+    Memoizes `action.check_prerequisites` results keyed by
+    (actor id, target id, action name, action-economy version).
+
+    The economy version of an entity is bumped whenever it executes any action (the
+    actions window invalidates the actor and target after every apply), moves or has
+    its action economy reset, so stale results are never looked up again.
+    """
+    def __init__(self):
+        self.results: Dict[CacheKey, bool] = {}
+        self.economy_versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def economy_version(self, entity: Entity) -> int:
+        return self.economy_versions.get(entity.id, 0)
+
+    def make_key(self, actor: Entity, target: Entity, action: Action) -> CacheKey:
+        return (actor.id, target.id, action.name, self.economy_version(actor))
+
+    def can_perform(self, actor: Entity, target: Entity, action: Action) -> bool:
+        key = self.make_key(actor, target, action)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        can_perform, _ = action.check_prerequisites(actor, target, {"action": action})
+        self.results[key] = can_perform
+        return can_perform
+
+    def invalidate(self, entity: Optional[Entity]):
+        """
+        Drop every entry where the entity is the actor or the target and bump its economy version.
+        """
+        if entity is None:
+            return
+        self.economy_versions[entity.id] = self.economy_version(entity) + 1
+        self.results = {key: value for key, value in self.results.items()
+                        if key[0] != entity.id and key[1] != entity.id}
+
+    def clear(self):
+        self.results.clear()
+        self.economy_versions.clear()
+
+    def precompute(self, battle_map: BattleMap) -> Dict[Tuple[str, str], Dict[str, bool]]:
+        """
+        Fill the cache for every actor/target pair on the map in one batch and return the
+        availability matrix as {(actor id, target id): {action name: can perform}}.
+        """
+        entities = entities_on_map(battle_map)
+        matrix: Dict[Tuple[str, str], Dict[str, bool]] = {}
+        for actor in entities:
+            attacks = [action for action in actor.actions if isinstance(action, Attack)]
+            for target in entities:
+                if target is actor:
+                    continue
+                matrix[(actor.id, target.id)] = {
+                    action.name: self.can_perform(actor, target, action) for action in attacks
+                }
+        return matrix
+
+def entities_on_map(battle_map: BattleMap) -> List[Entity]:
+    entities = []
+    for entity_ids in battle_map.positions.values():
+        for entity_id in entity_ids or ():
+            entity = Entity.get_instance(entity_id)
+            if entity is not None:
+                entities.append(entity)
+    return entities
+
+prerequisite_cache = PrerequisiteCache()
+
+@handle_game_event(GameEventType.ACTION_PERFORMED)
+def on_action_performed(event: GameEvent):
+    prerequisite_cache.invalidate(event.data.get('attacker'))
+    prerequisite_cache.invalidate(event.data.get('defender'))
+
+@handle_game_event(GameEventType.ENTITY_MOVED)
+def on_entity_moved(event: GameEvent):
+    prerequisite_cache.invalidate(event.data.get('entity'))
+
+@handle_game_event(GameEventType.UPDATE_ACTIONS)
+def on_update_actions(event: GameEvent):
+    prerequisite_cache.invalidate(event.data.get('entity'))
+
+@handle_game_event(GameEventType.BATTLEMAP_LOADED)
+def on_battlemap_loaded(event: GameEvent):
+    prerequisite_cache.clear()
+    prerequisite_cache.precompute(event.data['battle_map'])
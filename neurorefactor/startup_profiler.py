@@ -0,0 +1,72 @@
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+class StartupProfiler:
+    """
+    Records import time per module and time per initialization step until the first frame.
+
+    Import times are cumulative (a module's time includes the modules it imports first),
+    like `python -X importtime`. Enable it with `--profile-startup` (checked in neurorefactor.main
+    before its imports) or by setting NEURODRAGON_PROFILE_STARTUP=1.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.import_times: Dict[str, float] = {}
+        self.steps: List[Tuple[str, float]] = []
+        self.first_frame: Optional[float] = None
+        self._original_import = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def disable(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.import_times.setdefault(name, time.perf_counter() - start)
+
+    @contextmanager
+    def measure(self, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.steps.append((label, time.perf_counter() - start))
+
+    def mark_first_frame(self):
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.start
+            self.disable()
+
+    def report(self, top: int = 20) -> str:
+        lines = ["Slowest imports (cumulative):"]
+        for name, seconds in sorted(self.import_times.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"{seconds * 1000:8.1f} ms  {name}")
+        lines.append("Initialization steps:")
+        for label, seconds in self.steps:
+            lines.append(f"{seconds * 1000:8.1f} ms  {label}")
+        if self.first_frame is not None:
+            lines.append(f"{self.first_frame * 1000:8.1f} ms  time to first frame")
+        return "\n".join(lines)
+
+startup_profiler = StartupProfiler()
+if os.environ.get("NEURODRAGON_PROFILE_STARTUP"):
+    startup_profiler.enable()
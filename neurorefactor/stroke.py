@@ -0,0 +1,74 @@
+from typing import Callable, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+ScreenPosition = Tuple[float, float]
+
+def bresenham_line(start: Cell, end: Cell) -> List[Cell]:
+    """
+    Every grid cell on the line from `start` to `end`, both included.
+    """
+    x0, y0 = start
+    x1, y1 = end
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    error = dx + dy
+    cells = []
+    while True:
+        cells.append((x0, y0))
+        if x0 == x1 and y0 == y1:
+            return cells
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x0 += step_x
+        if doubled <= dx:
+            error += dx
+            y0 += step_y
+
+class Stroke:
+    """
+    A paint stroke: the mouse samples of one drag, rasterized into grid cells once per frame.
+
+    Samples are only recorded while handling events; `flush` converts them to grid cells,
+    joins consecutive cells with a Bresenham line so fast drags don't skip tiles, and returns
+    each newly covered cell once. A `None` sample (pointer outside the canvas) breaks the line.
+    """
+    def __init__(self, to_grid: Callable[[float, float], Cell]):
+        self.to_grid = to_grid
+        self.samples: List[Optional[ScreenPosition]] = []
+        self.last_cell: Optional[Cell] = None
+        self.active = False
+
+    def begin(self, position: Optional[ScreenPosition]):
+        self.active = True
+        self.last_cell = None
+        self.samples = [position]
+
+    def add_sample(self, position: Optional[ScreenPosition]):
+        if self.active:
+            self.samples.append(position)
+
+    def end(self):
+        # Samples still pending are applied by the next flush
+        self.active = False
+
+    def flush(self) -> List[Cell]:
+        cells: List[Cell] = []
+        seen = set()
+        for position in self.samples:
+            if position is None:
+                self.last_cell = None
+                continue
+            cell = self.to_grid(*position)
+            if cell == self.last_cell:
+                continue
+            line = [cell] if self.last_cell is None else bresenham_line(self.last_cell, cell)[1:]
+            for line_cell in line:
+                if line_cell not in seen:
+                    seen.add(line_cell)
+                    cells.append(line_cell)
+            self.last_cell = cell
+        self.samples = []
+        return cells
@@ -0,0 +1,105 @@
+import math
+from typing import Hashable, List, Mapping, Sequence, Tuple
+from neurorefactor.stroke import bresenham_line
+from neurorefactor.tile_layer import TileLayer
+
+Cell = Tuple[int, int]
+
+FILL_TOOLS = ["brush", "fill", "rectangle", "lasso"]
+
+def tag_columns(tags: Mapping[Cell, Hashable], width: int, height: int) -> List[list]:
+    """
+    The tags of the width x height grid as columns[x][y]; tile layers yield palette indices.
+    """
+    if isinstance(tags, TileLayer):
+        return tags.index_array(width, height).tolist()
+    columns = [[None] * height for _ in range(width)]
+    for (x, y), tag in tags.items():
+        if 0 <= x < width and 0 <= y < height:
+            columns[x][y] = tag
+    return columns
+
+def flood_fill(tags: Mapping[Cell, Hashable], start: Cell, width: int, height: int) -> List[Cell]:
+    """
+    Scanline flood fill: every cell connected to `start` (4-neighbourhood) that has the same
+    tag as `start`, an untagged start filling the untagged region. Cells outside the
+    width x height grid are never returned.
+    """
+    start_x, start_y = start
+    if not (0 <= start_x < width and 0 <= start_y < height):
+        return []
+    columns = tag_columns(tags, width, height)
+    target = columns[start_x][start_y]
+    visited = [bytearray(height) for _ in range(width)]
+    cells: List[Cell] = []
+    stack = [start]
+    while stack:
+        x, y = stack.pop()
+        if visited[x][y] or columns[x][y] != target:
+            continue
+        left = x
+        while left > 0 and not visited[left - 1][y] and columns[left - 1][y] == target:
+            left -= 1
+        right = x
+        while right < width - 1 and not visited[right + 1][y] and columns[right + 1][y] == target:
+            right += 1
+        for span_x in range(left, right + 1):
+            visited[span_x][y] = 1
+            cells.append((span_x, y))
+
+        # Seed one point per run of matching cells on the rows above and below
+        for next_y in (y - 1, y + 1):
+            if not 0 <= next_y < height:
+                continue
+            in_run = False
+            for span_x in range(left, right + 1):
+                if not visited[span_x][next_y] and columns[span_x][next_y] == target:
+                    if not in_run:
+                        stack.append((span_x, next_y))
+                        in_run = True
+                else:
+                    in_run = False
+    return cells
+
+def rectangle_cells(corner: Cell, opposite_corner: Cell, width: int, height: int) -> List[Cell]:
+    """
+    Every cell of the grid-aligned rectangle spanned by the two corners, clipped to the grid.
+    """
+    left, right = sorted((corner[0], opposite_corner[0]))
+    top, bottom = sorted((corner[1], opposite_corner[1]))
+    return [(x, y)
+            for x in range(max(left, 0), min(right, width - 1) + 1)
+            for y in range(max(top, 0), min(bottom, height - 1) + 1)]
+
+def lasso_cells(vertices: Sequence[Cell], width: int, height: int) -> List[Cell]:
+    """
+    Every cell inside the closed polygon through `vertices` (even-odd rule), plus the
+    outline itself, clipped to the grid.
+    """
+    edges = list(zip(vertices, list(vertices[1:]) + [vertices[0]]))
+    cells = {(x, y) for start, end in edges for x, y in bresenham_line(start, end)
+             if 0 <= x < width and 0 <= y < height}
+    if len(vertices) < 3:
+        return list(cells)
+    top = max(min(y for _, y in vertices), 0)
+    bottom = min(max(y for _, y in vertices), height - 1)
+    for y in range(top, bottom + 1):
+        crossings = sorted(x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+                           for (x0, y0), (x1, y1) in edges
+                           if (y0 <= y < y1) or (y1 <= y < y0))
+        for start, end in zip(crossings[::2], crossings[1::2]):
+            for x in range(max(math.ceil(start), 0), min(math.floor(end), width - 1) + 1):
+                cells.add((x, y))
+    return list(cells)
+
+def shape_cells(tool: str, outline: Sequence[Cell], width: int, height: int) -> List[Cell]:
+    """
+    Cells covered by a rectangle or lasso drag whose rasterized pointer path is `outline`.
+    """
+    if not outline:
+        return []
+    if tool == "rectangle":
+        return rectangle_cells(outline[0], outline[-1], width, height)
+    if tool == "lasso":
+        return lasso_cells(outline, width, height)
+    raise ValueError(f"Unknown shape tool: {tool}")
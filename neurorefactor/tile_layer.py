@@ -0,0 +1,206 @@
+import numpy as np
+from collections.abc import MutableMapping
+from typing import Any, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple
+
+Cell = Tuple[int, int]
+
+class TileLayer(MutableMapping):
+    """
+    Per-cell tags (terrain, entity, ...) stored as a uint8 array of palette indices.
+
+    Behaves like the {(x, y): tag} dicts it replaces, so existing code keeps working, with
+    O(1) get/set and vectorized queries on top. Index 0 means "no tag", so a layer holds at
+    most 255 distinct tags. The array grows on demand when a cell outside it is set; tags
+    outside the current grid bounds are kept, just as they were in the dict form.
+
+    Validates from and serializes to the JSON form {"x,y": tag} when used as a pydantic field.
+    """
+    MAX_TAGS = 255
+
+    def __init__(self, width: int = 0, height: int = 0, palette: Optional[List[Hashable]] = None):
+        self.data = np.zeros((width, height), dtype=np.uint8)
+        self.width = width
+        self.height = height
+        self.palette: List[Optional[Hashable]] = [None]
+        self.palette_ids: Dict[Hashable, int] = {}
+        for tag in palette or ():
+            self.tag_index(tag)
+
+    def tag_index(self, tag: Optional[Hashable]) -> int:
+        if tag is None:
+            return 0
+        index = self.palette_ids.get(tag)
+        if index is None:
+            if len(self.palette) > self.MAX_TAGS:
+                raise ValueError(f"A tile layer holds at most {self.MAX_TAGS} distinct tags")
+            index = self.palette_ids[tag] = len(self.palette)
+            self.palette.append(tag)
+        return index
+
+    def get(self, cell: Cell, default: Any = None) -> Any:
+        x, y = cell
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = self.data[x, y]
+            if index:
+                return self.palette[index]
+        return default
+
+    def __getitem__(self, cell: Cell) -> Hashable:
+        tag = self.get(cell)
+        if tag is None:
+            raise KeyError(cell)
+        return tag
+
+    def __setitem__(self, cell: Cell, tag: Optional[Hashable]):
+        """
+        Setting a cell to None removes its tag.
+        """
+        x, y = cell
+        if x < 0 or y < 0:
+            raise KeyError(f"Cells must have non-negative coordinates, got {cell}")
+        if x >= self.width or y >= self.height:
+            self.resize(max(x + 1, self.width), max(y + 1, self.height))
+        self.data[x, y] = self.tag_index(tag)
+
+    def __delitem__(self, cell: Cell):
+        if self.get(cell) is None:
+            raise KeyError(cell)
+        self.data[cell[0], cell[1]] = 0
+
+    def pop(self, cell: Cell, *default):
+        tag = self.get(cell)
+        if tag is None:
+            if default:
+                return default[0]
+            raise KeyError(cell)
+        self.data[cell[0], cell[1]] = 0
+        return tag
+
+    def __contains__(self, cell) -> bool:
+        return isinstance(cell, tuple) and len(cell) == 2 and self.get(cell) is not None
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.data))
+
+    def __iter__(self) -> Iterator[Cell]:
+        return iter([tuple(cell) for cell in np.argwhere(self.data).tolist()])
+
+    def items(self) -> List[Tuple[Cell, Hashable]]:
+        xs, ys = np.nonzero(self.data)
+        palette = self.palette
+        return [((x, y), palette[index]) for x, y, index in zip(xs.tolist(), ys.tolist(), self.data[xs, ys].tolist())]
+
+    def values(self) -> List[Hashable]:
+        palette = self.palette
+        return [palette[index] for index in self.data[self.data != 0].tolist()]
+
+    def clear(self):
+        self.data.fill(0)
+
+    def copy(self) -> "TileLayer":
+        layer = TileLayer(palette=self.palette[1:])
+        layer.data = self.data.copy()
+        layer.width, layer.height = self.width, self.height
+        return layer
+
+    def resize(self, width: int, height: int):
+        """
+        Grow the array to at least width x height. The array never shrinks, so no tag is lost.
+        """
+        if width <= self.width and height <= self.height:
+            return
+        # Grow geometrically so painting outward doesn't copy the array on every cell
+        width = max(width, self.width * 2) if width > self.width else self.width
+        height = max(height, self.height * 2) if height > self.height else self.height
+        data = np.zeros((width, height), dtype=np.uint8)
+        data[:self.width, :self.height] = self.data
+        self.data = data
+        self.width, self.height = width, height
+
+    def index_array(self, width: int, height: int) -> np.ndarray:
+        """
+        Palette indices of the width x height window at the origin, zero-padded if the layer is smaller.
+        """
+        window = np.zeros((width, height), dtype=np.uint8)
+        w, h = min(width, self.width), min(height, self.height)
+        window[:w, :h] = self.data[:w, :h]
+        return window
+
+    def mask(self, tag: Hashable) -> np.ndarray:
+        index = self.palette_ids.get(tag)
+        if index is None:
+            return np.zeros(self.data.shape, dtype=bool)
+        return self.data == index
+
+    def cells_with(self, tag: Hashable) -> np.ndarray:
+        """
+        An (N, 2) array with the (x, y) of every cell tagged `tag`.
+        """
+        return np.argwhere(self.mask(tag))
+
+    def counts(self) -> Dict[Hashable, int]:
+        counts = np.bincount(self.data.ravel(), minlength=len(self.palette))
+        return {tag: int(counts[index]) for index, tag in enumerate(self.palette) if index and counts[index]}
+
+    def to_dict(self) -> Dict[Cell, Hashable]:
+        return dict(self.items())
+
+    def to_json_dict(self) -> Dict[str, Hashable]:
+        return {f"{x},{y}": tag for (x, y), tag in self.items()}
+
+    @classmethod
+    def from_dict(cls, tags: Mapping) -> "TileLayer":
+        """
+        Build a layer from {(x, y): tag} or the JSON form {"x,y": tag}. Keys that are not a
+        cell are skipped with a warning.
+        """
+        cells = []
+        values = []
+        for key, tag in tags.items():
+            cell = parse_cell(key)
+            if cell is None:
+                print(f"Skipping invalid tile tag key: {key}")
+                continue
+            cells.append(cell)
+            values.append(tag)
+        if not cells:
+            return cls()
+        coordinates = np.array(cells, dtype=np.int64)
+        layer = cls(int(coordinates[:, 0].max()) + 1, int(coordinates[:, 1].max()) + 1)
+        layer.data[coordinates[:, 0], coordinates[:, 1]] = [layer.tag_index(tag) for tag in values]
+        return layer
+
+    @classmethod
+    def coerce(cls, value: Any) -> "TileLayer":
+        if isinstance(value, TileLayer):
+            return value
+        if isinstance(value, Mapping):
+            return cls.from_dict(value)
+        raise ValueError(f"Expected a TileLayer or a mapping of cells to tags, got {type(value).__name__}")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        from pydantic_core import core_schema
+        return core_schema.no_info_plain_validator_function(
+            cls.coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda layer: layer.to_json_dict())
+        )
+
+    def __repr__(self) -> str:
+        return f"TileLayer({self.width}x{self.height}, {self.counts()})"
+
+def parse_cell(key: Any) -> Optional[Cell]:
+    if isinstance(key, tuple) and len(key) == 2:
+        x, y = key
+    elif isinstance(key, str):
+        parts = key.split(',')
+        if len(parts) != 2:
+            return None
+        x, y = parts
+    else:
+        return None
+    try:
+        x, y = int(x), int(y)
+    except ValueError:
+        return None
+    return (x, y) if x >= 0 and y >= 0 else None
@@ -7,6 +7,7 @@ from dnd.actions import Attack, MovementAction, Action
 from dnd.battlemap import Entity
 from neurorefactor.config import config
 from neurorefactor.event_handler import event_handler, handle_game_event, GameEventType, GameEvent
+from neurorefactor.prerequisite_cache import prerequisite_cache
 
 class ActionsWindow(UIWindow):
     def __init__(self, rect: pygame.Rect, manager: pygame_gui.UIManager):
@@ -20,6 +21,8 @@ class ActionsWindow(UIWindow):
         self.target_entity: Optional[Entity] = None
         self.actions: List[Action] = []
         self.action_buttons: List[UIButton] = []
+        self.button_themes: List[str] = []
+        self.constructions_avoided = 0
 
         self.reset_button = UIButton(
             relative_rect=pygame.Rect(10, 10, rect.width - 20, 30),
@@ -50,6 +53,11 @@ class ActionsWindow(UIWindow):
             else:
                 self.update_actions(self.active_entity)
 
+        @handle_game_event(GameEventType.UPDATE_ACTIONS)
+        def on_update_actions(event: GameEvent):
+            if event.data.get('entity') is self.active_entity:
+                self.update_actions(self.active_entity, self.target_entity)
+
     def update_actions(self, entity: Optional[Entity], target_entity: Optional[Entity] = None):
         print(f"Updating actions for entity: {entity}")
         self.active_entity = entity
@@ -61,34 +69,49 @@ class ActionsWindow(UIWindow):
         self._create_action_buttons()
 
     def _create_action_buttons(self):
-        print(f"Creating action buttons. Number of actions: {len(self.actions)}")
-        for button in self.action_buttons:
-            button.kill()
-        self.action_buttons.clear()
-
+        """
+        Refresh the pooled action buttons in place. Existing buttons are relabelled, re-themed
+        only when their theme class changes and hidden when unused; the pool only grows.
+        """
         button_height = 50
         spacing = 5
         total_height = max(len(self.actions) * (button_height + spacing), self.actions_container.rect.height)
-        
-        print(f"Setting scrollable area dimensions. Width: {self.actions_container.rect.width}, Height: {total_height}")
         self.actions_container.set_scrollable_area_dimensions((self.actions_container.rect.width, total_height))
 
         for i, action in enumerate(self.actions):
             button_theme = self._get_button_theme(action)
-            button = UIButton(
-                relative_rect=pygame.Rect(5, i * (button_height + spacing), self.actions_container.rect.width - 10, button_height),
-                text=action.name,
-                manager=self.ui_manager,
-                container=self.actions_container,
-                object_id=ObjectID(class_id=button_theme, object_id=f"#action_button_{i}")
-            )
-            self.action_buttons.append(button)
+            if i < len(self.action_buttons):
+                button = self.action_buttons[i]
+                if button.text != action.name:
+                    button.set_text(action.name)
+                if self.button_themes[i] != button_theme:
+                    button.change_object_id(ObjectID(class_id=button_theme, object_id=f"#action_button_{i}"))
+                    self.button_themes[i] = button_theme
+                if not button.visible:
+                    button.show()
+                self.constructions_avoided += 1
+            else:
+                button = UIButton(
+                    relative_rect=pygame.Rect(5, i * (button_height + spacing), self.actions_container.rect.width - 10, button_height),
+                    text=action.name,
+                    manager=self.ui_manager,
+                    container=self.actions_container,
+                    object_id=ObjectID(class_id=button_theme, object_id=f"#action_button_{i}")
+                )
+                self.action_buttons.append(button)
+                self.button_themes.append(button_theme)
+
+        for button in self.action_buttons[len(self.actions):]:
+            if button.visible:
+                button.hide()
+
+        if config.debug:
+            print(f"Action buttons: {len(self.actions)} shown, pool size {len(self.action_buttons)}, "
+                  f"{self.constructions_avoided} constructions avoided")
 
     def _get_button_theme(self, action: Action) -> str:
         if isinstance(action, Attack) and self.target_entity:
-            context = {"action": action}
-            can_perform, _ = action.check_prerequisites(self.active_entity, self.target_entity, context)
-            print(f"Checking prerequisites for action {action.name}: {can_perform}")
+            can_perform = prerequisite_cache.can_perform(self.active_entity, self.target_entity, action)
             return "@action_button_green" if can_perform else "@action_button_red"
         elif isinstance(action, MovementAction):
             return "@action_button_blue"
@@ -99,7 +122,7 @@ class ActionsWindow(UIWindow):
             if event.ui_element == self.reset_button:
                 self._handle_reset_action_economy()
             else:
-                for i, button in enumerate(self.action_buttons):
+                for i, button in enumerate(self.action_buttons[:len(self.actions)]):
                     if event.ui_element == button:
                         self._handle_action_click(i)
                         break
@@ -115,6 +138,9 @@ class ActionsWindow(UIWindow):
         if 0 <= action_index < len(self.actions):
             action: Action = self.actions[action_index]
             result = action.apply(self.active_entity, self.target_entity)
+            # Any action can spend the actor's economy, not just the attacks and moves announced below
+            prerequisite_cache.invalidate(self.active_entity)
+            prerequisite_cache.invalidate(self.target_entity)
             #onyl dispatch attacks 
             if isinstance(action, Attack):
                 event_handler.dispatch_game_event(GameEventType.ACTION_PERFORMED, {
@@ -123,6 +149,8 @@ class ActionsWindow(UIWindow):
                     "attacker": self.active_entity,
                     "defender": self.target_entity
                 })
+            elif isinstance(action, MovementAction):
+                event_handler.dispatch_game_event(GameEventType.ENTITY_MOVED, {"entity": self.active_entity})
             self.update_actions(self.active_entity, self.target_entity)
             event_handler.dispatch_game_event(GameEventType.RENDER_BATTLEMAP)  # Add this line
 
@@ -4,6 +4,7 @@ from pygame_gui.elements import UIWindow, UITextBox, UIImage
 from dnd.battlemap import Entity
 from typing import Optional
 from neurorefactor.config import config
+from neurorefactor.ui.portrait_cache import portrait_cache
 from neurorefactor.event_handler import handle_game_event, GameEventType, GameEvent
 
 class ActiveEntityWindow(UIWindow):
@@ -54,15 +55,7 @@ class ActiveEntityWindow(UIWindow):
             details = f"Name: {entity.name}<br>Hit Points: {entity.hp}/{entity.health.max_hit_points}<br>ID: {entity.id}"
             self.text_element.set_text(details)
 
-            combined_surface = pygame.Surface((80, 80), pygame.SRCALPHA)
-            entity_sprite_path = config.sprites.paths.get(entity.name)
-
-            if entity_sprite_path:
-                entity_sprite_surface = pygame.image.load(entity_sprite_path).convert_alpha()
-                entity_sprite_surface = pygame.transform.scale(entity_sprite_surface, (80, 80))
-                combined_surface.blit(entity_sprite_surface, (0, 0))
-
-            self.image_element.set_image(combined_surface)
+            self.image_element.set_image(portrait_cache.get_portrait(None, entity.name, 80))
         else:
             self.text_element.set_text("No active entity.")
             self.image_element.set_image(self.default_surface)
@@ -1,6 +1,7 @@
 import pygame
 from typing import Tuple, List, Set
 from neurorefactor.config import config
+from neurorefactor.ui.text_cache import text_cache
 from dnd.battlemap import Entity
 
 def draw_grid(surface: pygame.Surface, grid_size: Tuple[int, int], tile_size: int, offset: Tuple[int, int]):
@@ -87,7 +88,7 @@ def render_battlemap(surface: pygame.Surface, battle_map, selected_entity, targe
             movement_budget = movement_budget_feet // config.game_rules.movement_cost
             reachable_positions = set(selected_entity.sensory.paths.get_reachable_positions(movement_budget))
 
-    font = pygame.font.Font(None, 32)
+    font = text_cache.font(None, 32)
 
     for y in range(battle_map.height):
         for x in range(battle_map.width):
@@ -8,6 +8,7 @@ from typing import Optional, Tuple, Dict
 import time
 
 from neurorefactor.config import config
+from neurorefactor.asset_manager import asset_manager
 from neurorefactor.event_handler import event_handler, handle_pygame_event, handle_game_event, GameEventType, GameEvent
 from neurorefactor.ui.battlemap_renderer import render_battlemap
 
@@ -69,8 +70,7 @@ class BattleMapWindow(UIWindow):
                 tool_tip_text=tooltip,
                 object_id=pygame_gui.core.ObjectID(class_id=f'@{button_id}_button')
             )
-            button_image = pygame.image.load(config.sprites.paths[button_id])
-            button_image = pygame.transform.scale(button_image, self.button_size)
+            button_image = asset_manager.get_image(config.sprites.paths[button_id], self.button_size)
             button.set_image(button_image)
             self.buttons.append(button)
             button_y += self.button_size[1]
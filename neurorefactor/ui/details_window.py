@@ -2,6 +2,7 @@ import pygame
 import pygame_gui
 from pygame_gui.elements import UIWindow, UITextBox, UIImage
 from neurorefactor.config import config
+from neurorefactor.ui.portrait_cache import portrait_cache
 from neurorefactor.event_handler import handle_game_event, GameEventType, GameEvent
 from dnd.battlemap import Entity
 from typing import Optional
@@ -61,20 +62,16 @@ class DetailsWindow(UIWindow):
         tile_type = battle_map.get_tile(*position)
         entity_ids = battle_map.positions.get(position, None)
         entity_name = None
-        sprite_path = None
 
         if entity_ids:
             entity_ids = list(entity_ids)
             entity = Entity.get_instance(entity_ids[0])
             entity_name = entity.name
-            sprite_path = config.sprites.paths.get(entity_name)
-        else:
-            sprite_path = config.sprites.paths.get(tile_type)
 
         details = f"Position: {position}<br>Tile Type: {tile_type}<br>Entity: {entity_name}"
         self.text_element.set_text(details)
 
-        self.update_image(tile_type, sprite_path)
+        self.update_image(tile_type, entity_name)
 
     def update_entity_details(self, entity: Optional[Entity]):
         if entity is None:
@@ -82,25 +79,10 @@ class DetailsWindow(UIWindow):
         details = f"Name: {entity.name}<br>HP: {entity.hp}/{entity.health.max_hit_points}<br>ID: {entity.id}"
         self.text_element.set_text(details)
 
-        sprite_path = config.sprites.paths.get(entity.name)
-        self.update_image(None, sprite_path)
+        self.update_image(None, entity.name)
 
-    def update_image(self, tile_type: str, entity_sprite_path: str):
-        image_size = 80
-        combined_surface = pygame.Surface((image_size, image_size), pygame.SRCALPHA)
-        tile_sprite_path = config.sprites.paths.get(tile_type) if tile_type else None
-
-        if tile_sprite_path:
-            tile_sprite_surface = pygame.image.load(tile_sprite_path).convert_alpha()
-            tile_sprite_surface = pygame.transform.scale(tile_sprite_surface, (image_size, image_size))
-            combined_surface.blit(tile_sprite_surface, (0, 0))
-
-        if entity_sprite_path:
-            entity_sprite_surface = pygame.image.load(entity_sprite_path).convert_alpha()
-            entity_sprite_surface = pygame.transform.scale(entity_sprite_surface, (image_size, image_size))
-            combined_surface.blit(entity_sprite_surface, (0, 0))
-
-        self.image_element.set_image(combined_surface)
+    def update_image(self, tile_type: Optional[str], entity_name: Optional[str]):
+        self.image_element.set_image(portrait_cache.get_portrait(tile_type, entity_name, 80))
 
     def clear_details(self):
         self.text_element.set_text("No details available")
@@ -0,0 +1,77 @@
+import threading
+import numpy as np
+import pygame
+from typing import List, Optional, Tuple
+
+class ImagePyramid:
+    """
+    Mipmap pyramid of an image, for drawing it at arbitrary scales without resampling the
+    full-resolution original every time.
+
+    Level 0 is the image itself; each further level halves the previous one with a 2x2 box
+    filter, down to MIN_SIZE pixels. The levels are built on a worker thread (the filtering runs
+    in numpy, outside the GIL) and picked up by `scaled` as they become ready, so until then
+    requests are served from the nearest larger level that exists.
+    """
+    MIN_SIZE = 32
+
+    def __init__(self, source: pygame.Surface):
+        self.source = source
+        self.levels: List[pygame.Surface] = [source]
+        self.built: List[pygame.Surface] = []
+        self.last_scaled: Optional[Tuple[Tuple[Tuple[int, int], bool], pygame.Surface]] = None
+        width, height = source.get_size()
+        # Copy the pixels here so the worker never touches a surface the main thread draws with
+        pixels = np.frombuffer(pygame.image.tobytes(source, 'RGBA'), dtype=np.uint8).reshape(height, width, 4)
+        self.worker = threading.Thread(target=self._build, args=(pixels,), name="image-pyramid", daemon=True)
+        self.worker.start()
+
+    def scaled(self, size: Tuple[int, int], smooth: bool = True) -> pygame.Surface:
+        """
+        The image scaled to `size`: one smoothscale from the smallest level at least that large,
+        or a nearest-neighbour scale if not `smooth` (for live previews). The result is cached
+        until a different size is asked for.
+        """
+        size = (max(int(size[0]), 1), max(int(size[1]), 1))
+        self._install_built()
+        if self.last_scaled and self.last_scaled[0] == (size, smooth):
+            return self.last_scaled[1]
+        level = self.level_for(size)
+        if level.get_size() == size:
+            surface = level
+        elif smooth:
+            surface = pygame.transform.smoothscale(level, size)
+        else:
+            surface = pygame.transform.scale(level, size)
+        self.last_scaled = ((size, smooth), surface)
+        return surface
+
+    def level_for(self, size: Tuple[int, int]) -> pygame.Surface:
+        level = self.levels[0]
+        for candidate in self.levels[1:]:
+            if candidate.get_width() < size[0] or candidate.get_height() < size[1]:
+                break
+            level = candidate
+        return level
+
+    def is_ready(self) -> bool:
+        return not self.worker.is_alive()
+
+    def wait(self, timeout: Optional[float] = None):
+        self.worker.join(timeout)
+        self._install_built()
+
+    def _install_built(self):
+        while len(self.levels) <= len(self.built):
+            level = self.built[len(self.levels) - 1]
+            # Converting needs the display, so it happens here on the main thread
+            if pygame.display.get_surface() is not None:
+                level = level.convert_alpha()
+            self.levels.append(level)
+
+    def _build(self, pixels: np.ndarray):
+        while min(pixels.shape[0], pixels.shape[1]) >= 2 * self.MIN_SIZE:
+            height, width = pixels.shape[0] // 2 * 2, pixels.shape[1] // 2 * 2
+            even = pixels[:height, :width].astype(np.uint16)
+            pixels = ((even[0::2, 0::2] + even[1::2, 0::2] + even[0::2, 1::2] + even[1::2, 1::2] + 2) >> 2).astype(np.uint8)
+            self.built.append(pygame.image.frombytes(pixels.tobytes(), (pixels.shape[1], pixels.shape[0]), 'RGBA'))
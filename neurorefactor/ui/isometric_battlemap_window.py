@@ -1,17 +1,23 @@
 import pygame
 import pygame_gui
 from pygame_gui.elements import UIWindow, UIImage, UIButton, UILabel
-from pygame_gui.windows import UIFileDialog
 from typing import Optional, Tuple, Dict
 import time
 import random
+import numpy as np
 
 from neurorefactor.config import config
+from neurorefactor.asset_manager import asset_manager
+from neurorefactor.asset_preloader import asset_preloader
 from neurorefactor.event_handler import event_handler, handle_pygame_event, handle_game_event, GameEventType, GameEvent
 from dnd.battlemap import Entity, BattleMap
-from dnd.monsters.goblin import create_goblin
-from dnd.monsters.skeleton import create_skeleton
-from .isometric_grid import IsometricGrid, GridConfig
+from neurorefactor.prerequisite_cache import entities_on_map
+from neurorefactor.map_bake import BUNDLE_SUFFIX, BakedMap, find_bundle, game_projection
+from neurorefactor.map_format import resolve_image_path
+from .isometric_grid import IsometricGrid, GridConfig, tile_color
+from .sprite_cache import SpriteCache
+from .sprite_batcher import IsometricSpriteBatcher
+from .pick_buffer import PickBuffer
 
 class IsometricBattlemapWindow(UIWindow):
     def __init__(self, rect: pygame.Rect, manager: pygame_gui.UIManager):
@@ -20,6 +26,11 @@ class IsometricBattlemapWindow(UIWindow):
         self.battle_map = None
         self.isometric_grid = None
         self.background_image = None
+        # Bumped by every map load, so a background decoded for an earlier map is dropped
+        self.load_generation = 0
+        self.label_layer: Optional[pygame.Surface] = None
+        self.sprite_cache = SpriteCache(keep_aspect=False)
+        self.sprite_batcher = IsometricSpriteBatcher()
         self.show_background = True
         self.show_grid = True
         self.show_labels = True
@@ -33,6 +44,7 @@ class IsometricBattlemapWindow(UIWindow):
         self.grey_column_width = 1.5 * self.button_size[0] + 6
 
         self.map_surface = pygame.Surface((self.rect.width - self.grey_column_width, self.rect.height), pygame.SRCALPHA)
+        self.pick_buffer = PickBuffer(self.map_surface.get_size()) if config.isometric.pick_buffer else None
         self.offset = (0, 0)
         self.grid_positions: Dict[Tuple[int, int], Tuple[int, int]] = {}
         self.fov_mode = False
@@ -43,6 +55,7 @@ class IsometricBattlemapWindow(UIWindow):
         self.paths_mode = False
         self.path_to_target_mode = False
         self.last_left_clicked = None
+        self.file_dialog = None
 
         self.image_element = UIImage(
             relative_rect=pygame.Rect((0, 0), (self.rect.width - self.grey_column_width, self.rect.height)),
@@ -87,8 +100,7 @@ class IsometricBattlemapWindow(UIWindow):
                 tool_tip_text=tooltip,
                 object_id=pygame_gui.core.ObjectID(class_id=f'@{button_id}_button')
             )
-            button_image = pygame.image.load(config.sprites.paths[button_id])
-            button_image = pygame.transform.scale(button_image, self.button_size)
+            button_image = asset_preloader.request(config.sprites.paths[button_id], self.button_size, on_ready=button.set_image)
             button.set_image(button_image)
             self.buttons[button_id] = button
             button_y += self.button_size[1]
@@ -104,6 +116,10 @@ class IsometricBattlemapWindow(UIWindow):
             self.target_position = event.data['position']
             self.render_battlemap()
 
+        @handle_game_event(GameEventType.ENTITY_MOVED)
+        def on_entity_moved(event: GameEvent):
+            self.sprite_batcher.move(event.data['entity'])
+
         @handle_game_event(GameEventType.RENDER_BATTLEMAP)
         def on_render_battlemap(event: GameEvent):
             self.render_battlemap()
@@ -150,39 +166,46 @@ class IsometricBattlemapWindow(UIWindow):
         self.update_grid_positions()
 
     def draw_grid(self):
+        lattice = self.isometric_grid.lattice
         for x in range(self.isometric_grid.width + 1):
-            start = self.isometric_grid.grid_to_screen(x, 0)
-            end = self.isometric_grid.grid_to_screen(x, self.isometric_grid.height)
+            start = lattice.vertex(x, 0)
+            end = lattice.vertex(x, self.isometric_grid.height)
             pygame.draw.line(self.map_surface, (255, 255, 255), start, end, 1)  # Changed color to white and thickness to 1
 
         for y in range(self.isometric_grid.height + 1):
-            start = self.isometric_grid.grid_to_screen(0, y)
-            end = self.isometric_grid.grid_to_screen(self.isometric_grid.width, y)
+            start = lattice.vertex(0, y)
+            end = lattice.vertex(self.isometric_grid.width, y)
             pygame.draw.line(self.map_surface, (255, 255, 255), start, end, 1)  # Changed color to white and thickness to 1
 
     def draw_labels(self):
+        if self.label_layer is not None:
+            self.map_surface.blit(self.label_layer, (0, 0))
+            return
         for x in range(self.isometric_grid.width):
             for y in range(self.isometric_grid.height):
                 tile_type = self.battle_map.get_tile(x, y)
                 color = self.get_tile_color(tile_type)
-                points = [
-                    self.isometric_grid.grid_to_screen(x, y),
-                    self.isometric_grid.grid_to_screen(x + 1, y),
-                    self.isometric_grid.grid_to_screen(x + 1, y + 1),
-                    self.isometric_grid.grid_to_screen(x, y + 1)
-                ]
-                pygame.draw.polygon(self.map_surface, color, points)
+                pygame.draw.polygon(self.map_surface, color, self.isometric_grid.lattice.polygon(x, y))
 
     def draw_entities(self):
-        for entity in Entity.all_instances():
-            if entity.position:
-                sprite_path = config.sprites.paths.get(entity.name)
-                if sprite_path:
-                    sprite = pygame.image.load(sprite_path)
-                    sprite = pygame.transform.scale(sprite, (self.isometric_grid.tile_size, self.isometric_grid.tile_size))
-                    screen_x, screen_y = self.isometric_grid.grid_to_screen(*entity.position)
-                    self.map_surface.blit(sprite, (screen_x - self.isometric_grid.tile_size // 2, 
-                                                   screen_y - self.isometric_grid.tile_size))
+        tile_size = self.isometric_grid.tile_size
+        drawn = []
+
+        def blit_for(entity):
+            sprite_path = config.sprites.paths.get(entity.name)
+            if not sprite_path:
+                return None
+            sprite = self.sprite_cache.get(entity.name, asset_manager.get_image(sprite_path), tile_size)
+            screen_x, screen_y = self.isometric_grid.grid_to_screen(*entity.position)
+            dest = (screen_x - tile_size // 2, screen_y - tile_size)
+            drawn.append((entity.id, sprite, dest))
+            return sprite, dest
+
+        # Only this map's entities, back to front (as projected) so nearer sprites overlap farther ones
+        self.sprite_batcher.set_projection(self.isometric_grid.projection)
+        self.sprite_batcher.draw(self.map_surface, blit_for)
+        if self.pick_buffer is not None:
+            self.pick_buffer.set_entities(drawn)
 
     def draw_fov(self):
         # Implement FOV drawing logic here
@@ -224,6 +247,7 @@ class IsometricBattlemapWindow(UIWindow):
             self.render_battlemap()
 
     def load_battlemap(self):
+        from pygame_gui.windows import UIFileDialog
         self.file_dialog = UIFileDialog(
             rect=pygame.Rect(160, 50, 440, 500),
             manager=self.ui_manager,
@@ -231,7 +255,7 @@ class IsometricBattlemapWindow(UIWindow):
             initial_file_path='',
             allow_picking_directories=False,
             allow_existing_files_only=True,
-            allowed_suffixes={".json"}
+            allowed_suffixes={".json", ".ndmap", BUNDLE_SUFFIX}
         )
 
     def process_event(self, event: pygame.event.Event):
@@ -251,43 +275,116 @@ class IsometricBattlemapWindow(UIWindow):
         
         super().process_event(event)
 
+    def update(self, time_delta: float):
+        super().update(time_delta)
+        if self.pick_buffer is not None and self.isometric_grid:
+            # Redraw a stale tile buffer a slice per frame; picks fall back to the projection meanwhile
+            self.pick_buffer.build(self.isometric_grid.lattice)
+
     def load_battlemap_from_file(self, file_path: str):
+        map_size = (self.rect.width - self.grey_column_width, self.rect.height)
+        # A baked bundle of the map, if up to date, loads without rebuilding anything
+        baked = find_bundle(file_path, map_size, game_projection())
+        if baked:
+            self.load_baked_battlemap(baked)
+            return
+        if file_path.endswith(BUNDLE_SUFFIX):
+            print(f"Cannot use bundle {file_path}, bake it again for this window")
+            return
+
         grid_config = GridConfig.load(file_path)
         self.battle_map = self.create_battlemap_from_config(grid_config)
         self.isometric_grid = IsometricGrid(
             self.battle_map.width,
             self.battle_map.height,
             config.isometric.tile_size,
-            (self.rect.width - self.grey_column_width, self.rect.height),
+            map_size,
             isometric_angle=config.isometric.isometric_angle,
             rotation=config.isometric.rotation
         )
-        if grid_config.image_path:
-            self.background_image = pygame.image.load(grid_config.image_path)
-            self.background_image = pygame.transform.scale(self.background_image, (self.rect.width - self.grey_column_width, self.rect.height))
+        self.label_layer = None
+        self.load_generation += 1
+        self.background_image = None
+        # Saved maps often carry absolute paths from another machine
+        image_path = resolve_image_path(grid_config.image_path)
+        if image_path:
+            generation = self.load_generation
+            # Transparent until decoded, and if decoding fails
+            self.background_image = asset_preloader.request(
+                image_path,
+                map_size,
+                on_ready=lambda background_image: self.on_background_ready(background_image, generation),
+                placeholder_color=(0, 0, 0, 0)
+            )
+        elif grid_config.image_path:
+            print(f"Background image not found: {grid_config.image_path}")
+        self.sprite_batcher.set_projection(self.isometric_grid.projection)
+        self.sprite_batcher.set_entities(entities_on_map(self.battle_map))
         self.render_battlemap()
         event_handler.dispatch_game_event(GameEventType.BATTLEMAP_LOADED, {"battle_map": self.battle_map})
 
+    def load_baked_battlemap(self, baked: BakedMap):
+        self.battle_map = self.create_battlemap(baked.width, baked.height, baked.tile_rows(), baked.floor_cells.tolist())
+        self.isometric_grid = IsometricGrid(
+            baked.width,
+            baked.height,
+            baked.projection['tile_size'],
+            baked.size,
+            origin=tuple(baked.projection['origin']),
+            isometric_angle=baked.projection['isometric_angle'],
+            rotation=baked.projection['rotation']
+        )
+        self.isometric_grid.lattice.set_vertices(baked.vertices)
+        self.load_generation += 1
+        self.background_image = baked.background
+        self.label_layer = baked.labels
+        self.sprite_batcher.set_projection(self.isometric_grid.projection)
+        self.sprite_batcher.set_entities(entities_on_map(self.battle_map))
+        self.render_battlemap()
+        event_handler.dispatch_game_event(GameEventType.BATTLEMAP_LOADED, {"battle_map": self.battle_map})
+
+    def on_background_ready(self, background_image: pygame.Surface, generation: int):
+        if generation != self.load_generation:
+            # Decoded for a map that has since been replaced
+            return
+        self.background_image = background_image
+        self.render_battlemap()
+
     def create_battlemap_from_config(self, grid_config: GridConfig) -> BattleMap:
-        battle_map = BattleMap(width=grid_config.grid_size_x, height=grid_config.grid_size_y)
+        tile_rows = [[grid_config.tile_tags.get((x, y), "FLOOR").upper() for y in range(grid_config.grid_size_y)]
+                     for x in range(grid_config.grid_size_x)]
+        return self.create_battlemap(grid_config.grid_size_x, grid_config.grid_size_y, tile_rows)
+
+    def create_battlemap(self, width: int, height: int, tile_rows, floor_cells=None) -> BattleMap:
+        """
+        Build the battle map from its tile types as tile_rows[x][y]. `floor_cells`, if known
+        (e.g. from a baked map), saves scanning the map for entity placement.
+        """
+        battle_map = BattleMap(width=width, height=height)
 
         # Set tiles based on the loaded configuration
-        for y in range(grid_config.grid_size_y):
-            for x in range(grid_config.grid_size_x):
-                tile_type = grid_config.tile_tags.get((x, y), "FLOOR").upper()
+        for x, column in enumerate(tile_rows):
+            for y, tile_type in enumerate(column):
                 battle_map.set_tile(x, y, tile_type)
 
         # Add entities to random floor tiles
-        self.add_entities_to_battlemap(battle_map)
+        self.add_entities_to_battlemap(battle_map, floor_cells)
 
         return battle_map
 
-    def add_entities_to_battlemap(self, battle_map: BattleMap):
+    def add_entities_to_battlemap(self, battle_map: BattleMap, floor_cells=None):
+        # Monster definitions are only needed once a map is loaded
+        from dnd.monsters.goblin import create_goblin
+        from dnd.monsters.skeleton import create_skeleton
+
         def get_random_floor_tile():
-            floor_tiles = [
-                (x, y) for x in range(battle_map.width) for y in range(battle_map.height)
-                if battle_map.get_tile(x, y) == "FLOOR" and not battle_map.positions.get((x, y))
-            ]
+            if floor_cells is not None:
+                floor_tiles = [(x, y) for x, y in floor_cells if not battle_map.positions.get((x, y))]
+            else:
+                floor_tiles = [
+                    (x, y) for x in range(battle_map.width) for y in range(battle_map.height)
+                    if battle_map.get_tile(x, y) == "FLOOR" and not battle_map.positions.get((x, y))
+                ]
             return random.choice(floor_tiles) if floor_tiles else None
 
         # Add a goblin
@@ -314,20 +411,18 @@ class IsometricBattlemapWindow(UIWindow):
             click_pos[1] - self.rect.top - container_rect.top
         )
 
+        if self.pick_buffer is not None:
+            # A sprite drawn over the pixel wins over the tile beneath it, so tall sprites are
+            # clickable on their whole body
+            entity_id = self.pick_buffer.pick_entity(adjusted_click_pos)
+            entity = Entity.get_instance(entity_id) if entity_id else None
+            if entity and entity.position:
+                return tuple(entity.position)
+            return self.pick_buffer.pick_tile(self.isometric_grid.lattice, adjusted_click_pos)
         return self.isometric_grid.screen_to_grid(*adjusted_click_pos)
 
     def get_tile_color(self, tile_type: str) -> Tuple[int, int, int, int]:
-        # Updated to include void and water labels
-        if tile_type == 'WALL':
-            return (255, 0, 0, 100)  # Red
-        elif tile_type == 'FLOOR':
-            return (0, 255, 0, 100)  # Green
-        elif tile_type == 'VOID':
-            return (0, 0, 0, 50)  # Semi-transparent Black
-        elif tile_type == 'WATER':
-            return (0, 0, 255, 100)  # Blue
-        else:
-            return (0, 0, 255, 100)  # Default to Blue
+        return tile_color(tile_type)
 
     def handle_click(self, click_pos: Tuple[int, int], click_type: str):
         grid_pos = self.get_grid_position(click_pos)
@@ -376,11 +471,13 @@ class IsometricBattlemapWindow(UIWindow):
 
     def update_grid_positions(self):
         self.grid_positions.clear()
-        for y in range(self.battle_map.height):
-            for x in range(self.battle_map.width):
-                screen_x, screen_y = self.isometric_grid.grid_to_screen(x, y)
-                if 0 <= screen_x < self.map_surface.get_width() and 0 <= screen_y < self.map_surface.get_height():
-                    self.grid_positions[(x, y)] = (screen_x, screen_y)
+        grid_x, grid_y = np.meshgrid(np.arange(self.battle_map.width), np.arange(self.battle_map.height))
+        cells = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+        screen = self.isometric_grid.projection.grid_to_screen_batch(cells).astype(int)
+        on_surface = ((screen[:, 0] >= 0) & (screen[:, 0] < self.map_surface.get_width()) &
+                      (screen[:, 1] >= 0) & (screen[:, 1] < self.map_surface.get_height()))
+        for (x, y), (screen_x, screen_y) in zip(cells[on_surface].tolist(), screen[on_surface].tolist()):
+            self.grid_positions[(x, y)] = (screen_x, screen_y)
 
 def create_isometric_battlemap_window(manager: pygame_gui.UIManager) -> IsometricBattlemapWindow:
     window_rect = pygame.Rect(
@@ -0,0 +1,115 @@
+import math
+import time
+import pygame
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from neurorefactor.isometric_projection import TileLattice
+
+Cell = Tuple[int, int]
+EntityBlit = Tuple[Hashable, pygame.Surface, Tuple[int, int]]
+
+class PickBuffer:
+    """
+    Off-screen ID buffers for pixel-accurate picking on an isometric map.
+
+    The tile buffer holds, for every pixel of the map surface, 1 + the index of the tile whose
+    polygon covers it (0 for none), drawn from the same lattice the map is drawn with. The
+    entity buffer holds 1 + the index of the entity whose sprite covers the pixel, using the
+    sprite's alpha mask, so tall sprites are picked above their tile. Each buffer is redrawn
+    only when the projection, the grid size or the entity placements change; a pick is a
+    single pixel read.
+
+    Drawing every tile polygon takes tens of milliseconds on large grids, so the tile buffer is
+    not redrawn on the pick that finds it stale: `build` (called once per frame) redraws it a
+    few columns at a time within BUILD_SECONDS, and until it is complete picks fall back to the
+    floored inverse projection, which only disagrees with the drawn polygons on their edges.
+    """
+    BUILD_SECONDS = 0.004
+
+    def __init__(self, size: Tuple[int, int]):
+        self.size = (int(size[0]), int(size[1]))
+        self.tiles = pygame.Surface(self.size, 0, 32)
+        self.entities = pygame.Surface(self.size, 0, 32)
+        self.tile_key = None
+        self.built_columns = 0
+        self.entity_key = None
+        self.entity_blits: List[EntityBlit] = []
+        self.entity_ids: List[Hashable] = []
+        self.masks: Dict[int, Tuple[pygame.Surface, pygame.mask.Mask]] = {}
+
+    def pick_tile(self, lattice: TileLattice, position: Tuple[int, int]) -> Optional[Cell]:
+        """
+        The cell of `lattice` drawn at `position` (relative to the map surface), or None.
+        """
+        if not self.is_built(lattice):
+            grid_x, grid_y = lattice.projection.screen_to_grid(position[0], position[1])
+            cell = (math.floor(grid_x), math.floor(grid_y))
+            return cell if 0 <= cell[0] < lattice.width and 0 <= cell[1] < lattice.height else None
+        index = self._read(self.tiles, position)
+        if not index:
+            return None
+        return divmod(index - 1, lattice.height)
+
+    def is_built(self, lattice: TileLattice) -> bool:
+        return self._tile_key(lattice) == self.tile_key and self.built_columns >= lattice.width
+
+    def build(self, lattice: TileLattice, seconds: Optional[float] = None) -> bool:
+        """
+        Continue drawing the tile buffer for `lattice` (restarting if the grid or projection
+        changed) for up to `seconds`. Returns True once it is complete.
+        """
+        key = self._tile_key(lattice)
+        if key != self.tile_key:
+            self.tiles.fill(0)
+            self.tile_key = key
+            self.built_columns = 0
+        deadline = time.perf_counter() + (self.BUILD_SECONDS if seconds is None else seconds)
+        while self.built_columns < lattice.width:
+            self._draw_column(lattice, self.built_columns)
+            self.built_columns += 1
+            if time.perf_counter() >= deadline:
+                break
+        return self.built_columns >= lattice.width
+
+    def set_entities(self, entity_blits: Iterable[EntityBlit]):
+        """
+        Register the entity sprites as drawn, back to front: (entity id, sprite, top-left).
+        The buffer is redrawn on the next pick, and only if the placements changed.
+        """
+        self.entity_blits = list(entity_blits)
+
+    def pick_entity(self, position: Tuple[int, int]) -> Optional[Hashable]:
+        key = tuple((entity_id, id(sprite), tuple(dest)) for entity_id, sprite, dest in self.entity_blits)
+        if key != self.entity_key:
+            self._draw_entities()
+            self.entity_key = key
+        index = self._read(self.entities, position)
+        return self.entity_ids[index - 1] if index else None
+
+    def _read(self, buffer: pygame.Surface, position: Tuple[int, int]) -> int:
+        x, y = int(position[0]), int(position[1])
+        if not (0 <= x < self.size[0] and 0 <= y < self.size[1]):
+            return 0
+        return buffer.get_at_mapped((x, y)) & 0xFFFFFF
+
+    def _tile_key(self, lattice: TileLattice):
+        return (lattice.projection.parameters, lattice.width, lattice.height)
+
+    def _draw_column(self, lattice: TileLattice, grid_x: int):
+        for grid_y in range(lattice.height):
+            # The mapped colour is the id itself
+            pygame.draw.polygon(self.tiles, 1 + grid_x * lattice.height + grid_y, lattice.polygon(grid_x, grid_y))
+
+    def _draw_entities(self):
+        self.entities.fill(0)
+        self.entity_ids = []
+        # Only the masks of the sprites drawn now are kept, so replaced sprites can be freed
+        masks, self.masks = self.masks, {}
+        for entity_id, sprite, dest in self.entity_blits:
+            self.entity_ids.append(entity_id)
+            cached = self.masks.get(id(sprite)) or masks.get(id(sprite))
+            if cached is None or cached[0] is not sprite:
+                cached = (sprite, pygame.mask.from_surface(sprite))
+            self.masks[id(sprite)] = cached
+            color = self.entities.unmap_rgb(len(self.entity_ids))
+            # Later (nearer) sprites overwrite earlier ones, as on screen
+            cached[1].to_surface(self.entities, setcolor=color, unsetcolor=None, dest=dest)
@@ -0,0 +1,36 @@
+import pygame
+from typing import Dict, Optional, Tuple
+from neurorefactor.config import config
+from neurorefactor.asset_manager import AssetManager, asset_manager
+
+PortraitKey = Tuple[Optional[str], Optional[str], int]
+
+class PortraitCache:
+    """
+    Composite tile + entity portraits shared by the details, target and active entity windows,
+    keyed by (tile type, entity name, size).
+    """
+    def __init__(self, manager: AssetManager):
+        self.manager = manager
+        self.portraits: Dict[PortraitKey, pygame.Surface] = {}
+
+    def get_portrait(self, tile_type: Optional[str], entity_name: Optional[str], size: int = 80) -> pygame.Surface:
+        key = (tile_type, entity_name, size)
+        portrait = self.portraits.get(key)
+        if portrait is None:
+            portrait = self._compose(tile_type, entity_name, size)
+            self.portraits[key] = portrait
+        return portrait
+
+    def _compose(self, tile_type: Optional[str], entity_name: Optional[str], size: int) -> pygame.Surface:
+        portrait = pygame.Surface((size, size), pygame.SRCALPHA)
+        for sprite_name in (tile_type, entity_name):
+            sprite_path = config.sprites.paths.get(sprite_name) if sprite_name else None
+            if sprite_path:
+                portrait.blit(self.manager.get_image(sprite_path, (size, size)), (0, 0))
+        return portrait
+
+    def clear(self):
+        self.portraits.clear()
+
+portrait_cache = PortraitCache(asset_manager)
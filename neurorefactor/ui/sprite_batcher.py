@@ -0,0 +1,101 @@
+import bisect
+import pygame
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from neurorefactor.isometric_projection import IsometricProjection
+
+DepthKey = Tuple[float, float, str]
+BlitFor = Callable[[Any], Optional[Tuple[pygame.Surface, Tuple[int, int]]]]
+
+def depth_key(entity_id: str, position: Tuple[int, int], projection: Optional[IsometricProjection] = None) -> DepthKey:
+    """
+    Back-to-front order: by the screen y of the cell's centre as projected (then its screen x),
+    so the order follows any rotation; the id keeps entities on the same cell in a stable order.
+    Without a projection, the unrotated order: by diagonal (x + y), then by y.
+    """
+    x, y = position
+    if projection is None:
+        return (x + y, y, entity_id)
+    screen_x, screen_y = projection.grid_to_screen(x + 0.5, y + 0.5)
+    return (screen_y, screen_x, entity_id)
+
+class IsometricSpriteBatcher:
+    """
+    Keeps the entities of the current battle map sorted back to front and draws them with a
+    single Surface.blits call. Depth comes from the projection handed to `set_projection`;
+    everything is re-sorted when its parameters change (e.g. a different rotation).
+
+    Only the entities handed to `set_entities` (the ones on the map) are tracked. A moved
+    entity is taken out of and re-inserted into the sorted order by bisection instead of
+    re-sorting everything; `draw` also picks up moves nobody reported by comparing each
+    entity's position with the one it was sorted by.
+    """
+    def __init__(self):
+        self.order: List[DepthKey] = []
+        self.keys: Dict[str, DepthKey] = {}
+        self.entities: Dict[str, Any] = {}
+        self.projection: Optional[IsometricProjection] = None
+        self.projection_parameters = None
+
+    def set_projection(self, projection: Optional[IsometricProjection]):
+        parameters = projection.parameters if projection is not None else None
+        if projection is self.projection and parameters == self.projection_parameters:
+            return
+        self.projection = projection
+        self.projection_parameters = parameters
+        self._sort()
+
+    def set_entities(self, entities: Iterable[Any]):
+        self.entities = {entity.id: entity for entity in entities}
+        self._sort()
+
+    def add(self, entity: Any):
+        self.entities[entity.id] = entity
+        self.move(entity)
+
+    def remove(self, entity: Any):
+        self.entities.pop(entity.id, None)
+        self._unlink(entity.id)
+
+    def move(self, entity: Any):
+        """
+        Re-insert `entity` at the depth of its current position.
+        """
+        if entity.id not in self.entities:
+            return
+        key = depth_key(entity.id, tuple(entity.position), self.projection) if entity.position else None
+        if key == self.keys.get(entity.id):
+            return
+        self._unlink(entity.id)
+        if key is not None:
+            self.keys[entity.id] = key
+            bisect.insort(self.order, key)
+
+    def sync(self):
+        # move() is a no-op for entities still where they were sorted
+        for entity in list(self.entities.values()):
+            self.move(entity)
+
+    def draw(self, surface: pygame.Surface, blit_for: BlitFor):
+        """
+        Blit every tracked entity back to front; `blit_for(entity)` returns its (sprite, position)
+        or None to skip it.
+        """
+        self.sync()
+        blits = []
+        for key in self.order:
+            blit = blit_for(self.entities[key[2]])
+            if blit is not None:
+                blits.append(blit)
+        surface.blits(blits, doreturn=False)
+
+    def _sort(self):
+        self.keys = {entity_id: depth_key(entity_id, tuple(entity.position), self.projection)
+                     for entity_id, entity in self.entities.items() if entity.position}
+        self.order = sorted(self.keys.values())
+
+    def _unlink(self, entity_id: str):
+        key = self.keys.pop(entity_id, None)
+        if key is not None:
+            index = bisect.bisect_left(self.order, key)
+            if index < len(self.order) and self.order[index] == key:
+                del self.order[index]
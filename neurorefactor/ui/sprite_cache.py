@@ -0,0 +1,37 @@
+import pygame
+from typing import Dict, Hashable, Optional, Tuple
+
+SpriteKey = Tuple[Hashable, int, float]
+
+class SpriteCache:
+    """
+    Entity sprites scaled to the current tile size, keyed by (entity type, tile size, aspect).
+
+    Sprites are `height_in_tiles` tiles tall; with `keep_aspect` their width follows the source
+    image's aspect ratio, otherwise they are square. Each sprite is scaled once per tile size,
+    and the whole cache is dropped when the tile size changes, so dragging the tile size slider
+    doesn't accumulate stale sizes. Each entry remembers the source surface it was scaled from
+    and is rescaled when a different one is passed in, e.g. after the sprite paths are reloaded.
+    """
+    def __init__(self, height_in_tiles: float = 1.0, keep_aspect: bool = True):
+        self.height_in_tiles = height_in_tiles
+        self.keep_aspect = keep_aspect
+        self.tile_size: Optional[int] = None
+        self.sprites: Dict[SpriteKey, Tuple[pygame.Surface, pygame.Surface]] = {}
+
+    def get(self, entity: Hashable, source: pygame.Surface, tile_size: int) -> pygame.Surface:
+        if tile_size != self.tile_size:
+            self.sprites.clear()
+            self.tile_size = tile_size
+        aspect = source.get_width() / source.get_height() if self.keep_aspect else 1.0
+        key = (entity, tile_size, aspect)
+        cached = self.sprites.get(key)
+        if cached is None or cached[0] is not source:
+            height = max(int(tile_size * self.height_in_tiles), 1)
+            width = max(int(height * aspect), 1)
+            cached = self.sprites[key] = (source, pygame.transform.smoothscale(source, (width, height)))
+        return cached[1]
+
+    def clear(self):
+        self.sprites.clear()
+        self.tile_size = None
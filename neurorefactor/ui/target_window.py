@@ -4,6 +4,7 @@ from pygame_gui.elements import UIWindow, UITextBox, UIImage
 from dnd.battlemap import Entity
 from typing import Optional, Tuple, Union
 from neurorefactor.config import config
+from neurorefactor.ui.portrait_cache import portrait_cache
 from neurorefactor.event_handler import handle_game_event, GameEventType, GameEvent
 
 class TargetWindow(UIWindow):
@@ -61,15 +62,7 @@ class TargetWindow(UIWindow):
             details = f"Name: {target.name}<br>Hit Points: {target.hp}/{target.health.max_hit_points}<br>ID: {target.id}"
             self.text_element.set_text(details)
 
-            combined_surface = pygame.Surface((80, 80), pygame.SRCALPHA)
-            entity_sprite_path = config.sprites.paths.get(target.name)
-
-            if entity_sprite_path:
-                entity_sprite_surface = pygame.image.load(entity_sprite_path).convert_alpha()
-                entity_sprite_surface = pygame.transform.scale(entity_sprite_surface, (80, 80))
-                combined_surface.blit(entity_sprite_surface, (0, 0))
-
-            self.image_element.set_image(combined_surface)
+            self.image_element.set_image(portrait_cache.get_portrait(None, target.name, 80))
         elif isinstance(target, tuple):
             self.target_pos = target
             self.target_entity = None
@@ -0,0 +1,43 @@
+import pygame
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+FontKey = Tuple[Optional[str], int]
+TextKey = Tuple[Optional[str], int, str, Tuple[int, ...], bool]
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (font, size, string, colour, antialias).
+
+    Fonts are constructed once per (font, size). Rendered strings are evicted least-recently-used
+    first beyond `max_entries`, so HUD text that changes with the hovered cell stays bounded while
+    an unchanged string is never re-rendered. The returned surfaces are shared; don't draw on them.
+    """
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.fonts: Dict[FontKey, pygame.font.Font] = {}
+        self.surfaces: "OrderedDict[TextKey, pygame.Surface]" = OrderedDict()
+
+    def font(self, name: Optional[str] = None, size: int = 36) -> pygame.font.Font:
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def render(self, text: str, size: int = 36, color: Tuple[int, ...] = (255, 255, 255),
+               font_name: Optional[str] = None, antialias: bool = True) -> pygame.Surface:
+        key = (font_name, size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.surfaces[key] = self.font(font_name, size).render(text, antialias, color)
+        while len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()